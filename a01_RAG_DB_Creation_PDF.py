@@ -5,7 +5,7 @@ RAG Database Creation Script for PDF Files
 This script creates a Retrieval Augmented Generation (RAG) database by:
 1. Reading PDF files from the _Cisco_AI_PDFs folder
 2. Converting PDFs to text
-3. Storing the text in a vector database (ChromaDB)
+3. Storing the text in a vector database (ChromaDB, or FAISS for large corpora)
 4. Providing query capabilities against the stored content
 
 Usage:
@@ -18,10 +18,33 @@ Usage:
 """
 
 import os
-import glob
-from pypdf import PdfReader
+import json
+import asyncio
+import queue
+import sqlite3
+import hashlib
+import functools
+import multiprocessing as mp
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import fitz  # PyMuPDF
+import numpy as np
 import chromadb
-from chromadb.utils import embedding_functions
+from sentence_transformers import SentenceTransformer
+
+# FAISS is only needed when VECTOR_STORE is "faiss"
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# Prefer LangChain's recursive splitter when it is installed
+try:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    TEXT_SPLITTER_AVAILABLE = True
+except ImportError:
+    TEXT_SPLITTER_AVAILABLE = False
 
 # Define paths
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -29,8 +52,82 @@ RAG_DIR = os.path.join(PROJECT_DIR, "rag")
 PDF_DIR = os.path.join(PROJECT_DIR, "_Cisco_AI_PDFs")
 TXT_DIR = os.path.join(PROJECT_DIR, "_Cisco_AI_TXTs")
 
+# Embedding settings
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DEVICE = None  # None lets sentence-transformers pick CUDA when available
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_CACHE_FILE = os.path.join(RAG_DIR, "embedding_cache.sqlite3")
+
+# Vector store backend: "chroma", or "faiss" for large static corpora where
+# Chroma's per-insert HNSW updates make ingestion slow
+VECTOR_STORE = "chroma"
+
+# Chroma settings
+COLLECTION_NAME = "cisco_ai_pdf_collection"
+ADD_BATCH_SIZE = 500
+# Cosine space matches our normalized embeddings; M/ef tuned for recall on
+# a read-heavy corpus
+CHROMA_HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:M": 32,
+    "hnsw:search_ef": 64
+}
+WRITER_QUEUE_SIZE = 8
+# Set CHROMA_HOST to write to a Chroma server instead of the local RAG_DIR
+CHROMA_HOST = None
+CHROMA_PORT = 8000
+CHROMA_MAX_INFLIGHT_WRITES = 4
+
+# FAISS settings
+FAISS_INDEX_FILE = os.path.join(RAG_DIR, "faiss_hnsw.index")
+FAISS_METADATA_FILE = os.path.join(RAG_DIR, "faiss_metadata.jsonl")
+FAISS_HNSW_M = 32
+FAISS_EF_CONSTRUCTION = 200
+FAISS_INT8 = True  # Store 8-bit scalar-quantized vectors (1/4 the memory of float32)
+
+# Sentence-ending punctuation followed by whitespace, used for chunk boundaries
+_SENTENCE_BOUNDARIES = frozenset({". ", ".\n", "? ", "?\n", "! ", "!\n"})
+# The same markers as code points, for the vectorized search in find_sentence_ends
+_SENTENCE_END_CODES = np.array(sorted({ord(b[0]) for b in _SENTENCE_BOUNDARIES}), dtype=np.uint32)
+_SENTENCE_GAP_CODES = np.array(sorted({ord(b[1]) for b in _SENTENCE_BOUNDARIES}), dtype=np.uint32)
+
 # --- PDF Processing Functions ---
 
+def extract_pdf_pages(pdf_path):
+    """
+    Extract the text of each page of a PDF file
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        List of page texts (empty pages included, so index + 1 is the page number)
+    """
+    try:
+        # "text" mode skips MuPDF's layout analysis
+        with fitz.open(pdf_path) as doc:
+            return [page.get_text("text") for page in doc]
+    
+    except Exception as e:
+        print(f"Error processing PDF {os.path.basename(pdf_path)}: {str(e)}")
+        return []
+
+def join_pages(pages):
+    """
+    Join page texts into a single document separated by form feeds
+    
+    Like pdftotext, a "\\f" separates pages, so text.split("\\f") recovers
+    the pages (and their numbers) without any per-page formatting.
+    
+    Args:
+        pages: List of page texts
+        
+    Returns:
+        Document text as a string
+    """
+    return "\f".join(pages)
+
 def convert_pdf_to_text(pdf_path):
     """
     Convert a PDF file to text
@@ -41,87 +138,190 @@ def convert_pdf_to_text(pdf_path):
     Returns:
         Extracted text as a string
     """
-    try:
-        reader = PdfReader(pdf_path)
-        text = ""
+    return join_pages(extract_pdf_pages(pdf_path))
+
+def extract_and_chunk_pdf(pdf_path):
+    """
+    Extract a PDF and chunk it page by page, in a pool worker
+    
+    Args:
+        pdf_path: Path to the PDF file
         
-        # Process each page
-        for page_num, page in enumerate(reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                text += f"--- Page {page_num + 1} ---\n" + page_text
-                
-        return text
+    Returns:
+        Tuple of (document text, ChunkBatch of the document's chunks)
+    """
+    file_name = os.path.basename(pdf_path)
+    pages = extract_pdf_pages(pdf_path)
     
-    except Exception as e:
-        print(f"Error processing PDF {os.path.basename(pdf_path)}: {str(e)}")
-        return ""
+    chunks = ChunkBatch()
+    for page_num, page_text in enumerate(pages):
+        chunk_page(page_text, file_name, page_num + 1, chunks)
+    
+    return join_pages(pages), chunks
 
 def process_pdf_files(pdf_dir, txt_dir):
     """
     Process all PDF files in the PDF directory, convert to text,
-    save as text files, and return the processed text
+    save as text files, and yield the processed text
     
-    Returns:
-        List of dictionaries containing file_name and text content
+    Chunks are yielded as each PDF finishes rather than collected into
+    one list, so memory stays bounded by a single document.
+    
+    Yields:
+        A ChunkBatch per PDF
     """
-    pdf_files = glob.glob(os.path.join(pdf_dir, "*.pdf"))
-    processed_documents = []
+    # Largest PDFs first so the slowest extractions start early in the pool
+    with os.scandir(pdf_dir) as entries:
+        pdf_entries = [entry for entry in entries
+                       if entry.is_file() and entry.name.lower().endswith(".pdf")]
+    pdf_entries.sort(key=lambda entry: entry.stat().st_size, reverse=True)
+    pdf_files = [entry.path for entry in pdf_entries]
+    chunk_count = 0
     
     print(f"\nFound {len(pdf_files)} PDF files to process.")
     
-    for pdf_path in pdf_files:
-        file_name = os.path.basename(pdf_path)
-        print(f"Processing: {file_name}")
-        
-        # Extract text from PDF
-        text_content = convert_pdf_to_text(pdf_path)
+    # Extract and chunk in a process pool - both are CPU-bound, so each PDF
+    # gets its own worker while the main process saves text and streams chunks
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(extract_and_chunk_pdf, pdf_path): pdf_path for pdf_path in pdf_files}
         
-        if not text_content:
-            print(f"Warning: No text extracted from {file_name}")
-            continue
+        for future in as_completed(futures):
+            file_name = os.path.basename(futures[future])
+            print(f"Processing: {file_name}")
             
-        # Save text to file
-        txt_path = os.path.join(txt_dir, file_name.replace(".pdf", ".txt"))
-        with open(txt_path, "w", encoding="utf-8") as txt_file:
-            txt_file.write(text_content)
+            # Extract text from PDF
+            text_content, chunks = future.result()
             
-        print(f"  - Saved text to: {os.path.basename(txt_path)}")
-        print(f"  - Extracted {len(text_content)} characters")
-        
-        # Chunk the document for better RAG performance
-        chunks = chunk_text(text_content, file_name)
-        processed_documents.extend(chunks)
+            if not text_content.strip():
+                print(f"Warning: No text extracted from {file_name}")
+                continue
+                
+            # Save text to file
+            txt_path = os.path.join(txt_dir, os.path.splitext(file_name)[0] + ".txt")
+            with open(txt_path, "w", encoding="utf-8") as txt_file:
+                txt_file.write(text_content)
+                
+            print(f"  - Saved text to: {os.path.basename(txt_path)}")
+            print(f"  - Extracted {len(text_content)} characters")
+            
+            # Chunks were built per page in the worker
+            chunk_count += len(chunks)
+            yield chunks
     
-    print(f"\nExtracted {len(processed_documents)} text chunks from {len(pdf_files)} PDF files.")
-    return processed_documents
+    print(f"\nExtracted {chunk_count} text chunks from {len(pdf_files)} PDF files.")
 
-def chunk_text(text, file_name, chunk_size=1000, overlap=200):
+class ChunkBatch:
+    """
+    Document chunks stored as parallel arrays rather than one dict per chunk
+    
+    Row i of every field describes the same chunk. Slicing a batch slices
+    each field, so downstream stages take only the columns they need.
+    String ids are built once when a chunk is appended.
+    """
+    
+    def __init__(self, file_names=None, chunk_ids=None, pages=None, texts=None, ids=None):
+        self.file_names = file_names if file_names is not None else []
+        self.chunk_ids = chunk_ids if chunk_ids is not None else array("i")
+        self.pages = pages if pages is not None else array("i")
+        self.texts = texts if texts is not None else []
+        self.ids = ids if ids is not None else []
+    
+    def __len__(self):
+        return len(self.texts)
+    
+    def append(self, file_name, chunk_id, page, text):
+        self.file_names.append(file_name)
+        self.chunk_ids.append(chunk_id)
+        self.pages.append(page)
+        self.texts.append(text)
+        self.ids.append(f"{file_name}_{chunk_id}")
+    
+    def extend(self, other):
+        self.file_names.extend(other.file_names)
+        self.chunk_ids.extend(other.chunk_ids)
+        self.pages.extend(other.pages)
+        self.texts.extend(other.texts)
+        self.ids.extend(other.ids)
+    
+    def slice(self, start, end):
+        return ChunkBatch(
+            self.file_names[start:end],
+            self.chunk_ids[start:end],
+            self.pages[start:end],
+            self.texts[start:end],
+            self.ids[start:end]
+        )
+    
+    def metadatas(self):
+        """Per-chunk metadata dictionaries, as vector stores expect them"""
+        return [{"file_name": file_name, "chunk_id": chunk_id, "page": page}
+                for file_name, chunk_id, page in zip(self.file_names, self.chunk_ids, self.pages)]
+
+def chunk_page(page_text, file_name, page_no, chunks):
+    """
+    Chunk a single page of text into a ChunkBatch
+    
+    Chunks never span a page break, so every page can be chunked on its own.
+    Chunk ids continue from the batch length so they stay unique per file.
+    
+    Args:
+        page_text: Text of the page
+        file_name: Source file name for metadata
+        page_no: 1-based page number
+        chunks: ChunkBatch to append to
+    """
+    if not page_text.strip():
+        return
+    
+    for text in chunk_text(page_text):
+        chunks.append(file_name, len(chunks), page_no, text)
+
+def find_sentence_ends(text):
+    """
+    Find every sentence-ending punctuation mark in one vectorized pass
+    
+    The text is viewed as UTF-32 code points so array indices are string
+    indices, which keeps the chunker's slicing exact for non-ASCII text.
+    
+    Args:
+        text: The text to scan
+        
+    Returns:
+        Sorted NumPy array of the indices of ".", "?" or "!" characters
+        that are followed by a space or newline
+    """
+    codes = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+    return np.flatnonzero(np.isin(codes[:-1], _SENTENCE_END_CODES) & np.isin(codes[1:], _SENTENCE_GAP_CODES))
+
+def chunk_text(text, chunk_size=1000, overlap=200):
     """
     Split text into overlapping chunks for better RAG performance
     
     Args:
         text: The text to chunk
-        file_name: Source file name for metadata
         chunk_size: Maximum chunk size in characters
         overlap: Overlap between chunks in characters
         
     Returns:
-        List of dictionaries with document chunks
+        List of chunk strings
     """
     chunks = []
     
     if len(text) <= chunk_size:
         # Text is small enough to be a single chunk
-        chunks.append({
-            "file_name": file_name,
-            "chunk_id": 0,
-            "text": text
-        })
+        chunks.append(text)
+    elif TEXT_SPLITTER_AVAILABLE:
+        # Split on paragraphs, then lines, then sentences, then words
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=overlap,
+            separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
+        )
+        chunks.extend(splitter.split_text(text))
     else:
-        # Split into overlapping chunks
+        # Fall back to our own sentence-aware overlapping chunks
+        sentence_ends = find_sentence_ends(text)
         start = 0
-        chunk_id = 0
         
         while start < len(text):
             # Calculate end position with potential sentence boundary alignment
@@ -129,24 +329,20 @@ def chunk_text(text, file_name, chunk_size=1000, overlap=200):
             
             # Try to find a good sentence boundary
             if end < len(text):
-                # Look for sentence-ending punctuation followed by space or newline
-                for i in range(end, max(start, end - 200), -1):
-                    if text[i-1:i+1] in [". ", ".\n", "? ", "?\n", "! ", "!\n"]:
-                        end = i
-                        break
+                # Look for the last sentence-ending punctuation followed by space
+                # or newline in the final 200 characters of the window
+                window_start = max(start, end - 200)
+                last = np.searchsorted(sentence_ends, end) - 1
+                if last >= 0 and sentence_ends[last] >= window_start:
+                    end = int(sentence_ends[last]) + 1
             
             chunk_text = text[start:end].strip()
             
             if chunk_text:
-                chunks.append({
-                    "file_name": file_name,
-                    "chunk_id": chunk_id,
-                    "text": chunk_text
-                })
+                chunks.append(chunk_text)
                 
             # Move start position for next chunk
             start = end - overlap
-            chunk_id += 1
             
             # Don't create empty or tiny chunks at the end
             if start >= len(text) - 200:
@@ -156,9 +352,117 @@ def chunk_text(text, file_name, chunk_size=1000, overlap=200):
 
 # --- ChromaDB Setup and RAG ---
 
+@functools.lru_cache(maxsize=1)
+def load_embedding_model():
+    """
+    Load the sentence-transformers model used to embed chunks and queries
+    
+    The model is loaded once per process and reused on later calls.
+    
+    Returns:
+        SentenceTransformer model
+    """
+    print(f"\nLoading embedding model: {EMBEDDING_MODEL_NAME}")
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=EMBEDDING_DEVICE)
+    print(f"Embedding model running on: {model.device}")
+    return model
+
+def embed_texts(model, texts, show_progress_bar=False):
+    """
+    Encode texts into normalized embeddings in large batches
+    
+    Args:
+        model: SentenceTransformer model
+        texts: List of strings to embed
+        show_progress_bar: Whether to display the encoding progress bar
+        
+    Returns:
+        NumPy array of embeddings, one row per text
+    """
+    return model.encode(
+        texts,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        show_progress_bar=show_progress_bar,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
+def embedding_cache_path(rag_dir):
+    """Get the embedding cache file kept next to the vector store files in rag_dir"""
+    return os.path.join(rag_dir, os.path.basename(EMBEDDING_CACHE_FILE))
+
+def open_embedding_cache(cache_path):
+    """
+    Open (or create) the persistent embedding cache
+    
+    Embeddings are stored by content hash so reruns only embed chunks
+    whose text has changed.
+    
+    Args:
+        cache_path: Path to the SQLite cache file
+        
+    Returns:
+        sqlite3 connection
+    """
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    # The async writer uses the connection from a single worker thread
+    cache = sqlite3.connect(cache_path, check_same_thread=False)
+    cache.execute("CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, embedding BLOB)")
+    return cache
+
+def embed_texts_cached(model, texts, cache, show_progress_bar=False):
+    """
+    Encode texts, reusing embeddings from the cache where possible
+    
+    Args:
+        model: SentenceTransformer model
+        texts: List of strings to embed
+        cache: sqlite3 connection from open_embedding_cache
+        show_progress_bar: Whether to display the encoding progress bar
+        
+    Returns:
+        NumPy array of embeddings, one row per text
+    """
+    # Key on the model name as well so switching models never reuses vectors
+    model_hasher = hashlib.blake2b(EMBEDDING_MODEL_NAME.encode("utf-8"), digest_size=16)
+    hashes = []
+    for text in texts:
+        hasher = model_hasher.copy()
+        hasher.update(text.encode("utf-8"))
+        hashes.append(hasher.digest())
+    
+    # Look up cached embeddings (in slices to stay under SQLite's variable limit)
+    cached = {}
+    for i in range(0, len(hashes), 500):
+        batch = hashes[i:i + 500]
+        placeholders = ",".join("?" * len(batch))
+        rows = cache.execute(
+            f"SELECT hash, embedding FROM embeddings WHERE hash IN ({placeholders})", batch
+        )
+        for text_hash, embedding in rows:
+            cached[text_hash] = np.frombuffer(embedding, dtype=np.float32)
+    
+    # Only the misses go through the model
+    misses = [i for i, text_hash in enumerate(hashes) if text_hash not in cached]
+    print(f"  Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+    if misses:
+        new_embeddings = embed_texts(model, [texts[i] for i in misses], show_progress_bar)
+        rows = []
+        for i, embedding in zip(misses, new_embeddings):
+            embedding = embedding.astype(np.float32)
+            cached[hashes[i]] = embedding
+            rows.append((hashes[i], embedding.tobytes()))
+        cache.executemany("INSERT OR REPLACE INTO embeddings (hash, embedding) VALUES (?, ?)", rows)
+        cache.commit()
+    
+    return np.stack([cached[text_hash] for text_hash in hashes])
+
 def setup_chroma_db(rag_dir):
     """
-    Initialize ChromaDB with embedding model
+    Initialize ChromaDB
+    
+    Embeddings are computed up front by embed_texts, so the collection is
+    created without an embedding function of its own.
     
     Returns:
         Tuple of (chroma_client, collection)
@@ -168,14 +472,7 @@ def setup_chroma_db(rag_dir):
     # Initialize Chroma client with persistent storage
     chroma_client = chromadb.PersistentClient(path=rag_dir)
     
-    # Define the embedding function using sentence-transformers model
-    embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    hf_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=embedding_model_name
-    )
-    
-    # Collection name
-    collection_name = "cisco_ai_pdf_collection"
+    collection_name = COLLECTION_NAME
     
     # Delete collection if it already exists (to start fresh)
     try:
@@ -187,19 +484,34 @@ def setup_chroma_db(rag_dir):
     # Create collection
     collection = chroma_client.create_collection(
         name=collection_name,
-        embedding_function=hf_ef
+        embedding_function=None,
+        metadata=CHROMA_HNSW_METADATA
     )
     print(f"Created new collection: {collection_name}")
     
     return chroma_client, collection
 
-def add_documents_to_chroma(collection, documents):
+def prepare_chroma_batch(documents):
+    """
+    Get the parallel lists Chroma expects from a ChunkBatch
+    
+    Args:
+        documents: ChunkBatch of document chunks
+        
+    Returns:
+        Tuple of (texts, ids, metadatas)
+    """
+    return documents.texts, documents.ids, documents.metadatas()
+
+def add_documents_to_chroma(collection, documents, model, embedding_cache=None):
     """
     Add documents to ChromaDB collection
     
     Args:
         collection: ChromaDB collection
-        documents: List of document dictionaries
+        documents: ChunkBatch of document chunks
+        model: SentenceTransformer model used to embed the documents
+        embedding_cache: Optional sqlite3 connection from open_embedding_cache
     """
     if not documents:
         print("No documents to add to ChromaDB.")
@@ -208,17 +520,25 @@ def add_documents_to_chroma(collection, documents):
     print(f"\nAdding {len(documents)} document chunks to ChromaDB...")
     
     # Prepare data for ChromaDB
-    texts = [doc["text"] for doc in documents]
-    ids = [f"{doc['file_name']}_{doc['chunk_id']}" for doc in documents]
-    metadatas = [{"file_name": doc["file_name"], "chunk_id": doc["chunk_id"]} for doc in documents]
+    texts, ids, metadatas = prepare_chroma_batch(documents)
     
-    # Add documents in batches to avoid memory issues
-    batch_size = 50
+    # Embed everything in one pass so the GPU (or CPU) works on large batches
+    print("  Computing embeddings...")
+    if embedding_cache is not None:
+        embeddings = embed_texts_cached(model, texts, embedding_cache, show_progress_bar=True)
+    else:
+        embeddings = embed_texts(model, texts, show_progress_bar=True)
+    
+    # Add documents in large batches - each add() carries fixed HNSW and
+    # persistence overhead, so fewer, bigger batches are much faster
+    batch_size = ADD_BATCH_SIZE
+    total_batches = (len(texts) + batch_size - 1) // batch_size
     for i in range(0, len(texts), batch_size):
         end_idx = min(i + batch_size, len(texts))
-        print(f"  Adding batch {i//batch_size + 1}/{(len(texts) + batch_size - 1)//batch_size}...")
+        print(f"  Adding batch {i//batch_size + 1}/{total_batches}...")
         
         collection.add(
+            embeddings=embeddings[i:end_idx],
             documents=texts[i:end_idx],
             ids=ids[i:end_idx],
             metadatas=metadatas[i:end_idx]
@@ -226,12 +546,237 @@ def add_documents_to_chroma(collection, documents):
     
     print(f"Successfully added {len(texts)} document chunks to ChromaDB.")
 
-def test_query(collection):
+def chroma_writer(document_queue, rag_dir):
+    """
+    Consumer process that embeds and stores document batches
+    
+    Owns the Chroma client and the embedding model so that encoding and
+    writes run alongside PDF extraction in the producer. Stops when it
+    receives None.
+    
+    Args:
+        document_queue: multiprocessing.Queue of ChunkBatch objects
+        rag_dir: Directory for the persistent Chroma database
+    """
+    chroma_client, collection = setup_chroma_db(rag_dir)
+    model = load_embedding_model()
+    embedding_cache = open_embedding_cache(embedding_cache_path(rag_dir))
+    
+    try:
+        while True:
+            documents = document_queue.get()
+            if documents is None:
+                break
+            add_documents_to_chroma(collection, documents, model, embedding_cache)
+    finally:
+        embedding_cache.close()
+
+async def setup_chroma_server_collection():
+    """
+    Connect to the Chroma server and recreate the collection
+    
+    Returns:
+        Async ChromaDB collection
+    """
+    print(f"\nConnecting to ChromaDB server at {CHROMA_HOST}:{CHROMA_PORT}...")
+    chroma_client = await chromadb.AsyncHttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    
+    # Delete collection if it already exists (to start fresh)
+    try:
+        await chroma_client.delete_collection(name=COLLECTION_NAME)
+        print(f"Deleted existing collection: {COLLECTION_NAME}")
+    except Exception:
+        pass
+    
+    collection = await chroma_client.create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=None,
+        metadata=CHROMA_HNSW_METADATA
+    )
+    print(f"Created new collection: {COLLECTION_NAME}")
+    return collection
+
+async def write_chroma_batch(collection, texts, ids, metadatas, embeddings, write_slots):
+    """
+    Send one batch to the Chroma server and free its write slot
+    
+    Args:
+        collection: Async ChromaDB collection
+        texts, ids, metadatas, embeddings: Parallel batch data
+        write_slots: asyncio.Semaphore bounding in-flight writes
+    """
+    try:
+        await collection.add(
+            embeddings=embeddings,
+            documents=texts,
+            ids=ids,
+            metadatas=metadatas
+        )
+        print(f"  Wrote {len(ids)} document chunks to ChromaDB server")
+    finally:
+        write_slots.release()
+
+async def chroma_server_writer_async(document_queue, rag_dir):
+    """
+    Embed batches while earlier batches are still being written to the server
+    
+    Args:
+        document_queue: multiprocessing.Queue of ChunkBatch objects
+        rag_dir: Directory for the local embedding cache
+    """
+    collection = await setup_chroma_server_collection()
+    model = load_embedding_model()
+    embedding_cache = open_embedding_cache(embedding_cache_path(rag_dir))
+    
+    loop = asyncio.get_running_loop()
+    # One thread keeps embedding (and cache access) serialized off the event loop
+    embed_executor = ThreadPoolExecutor(max_workers=1)
+    write_slots = asyncio.Semaphore(CHROMA_MAX_INFLIGHT_WRITES)
+    writes = []
+    
+    try:
+        while True:
+            documents = await loop.run_in_executor(None, document_queue.get)
+            if documents is None:
+                break
+            
+            texts, ids, metadatas = prepare_chroma_batch(documents)
+            embeddings = await loop.run_in_executor(
+                embed_executor, embed_texts_cached, model, texts, embedding_cache
+            )
+            
+            await write_slots.acquire()
+            writes.append(asyncio.create_task(
+                write_chroma_batch(collection, texts, ids, metadatas, embeddings, write_slots)
+            ))
+        
+        await asyncio.gather(*writes)
+    finally:
+        embed_executor.shutdown()
+        embedding_cache.close()
+
+def chroma_server_writer(document_queue, rag_dir):
+    """
+    Consumer process that writes document batches to a Chroma server
+    
+    Args:
+        document_queue: multiprocessing.Queue of ChunkBatch objects
+        rag_dir: Directory for the local embedding cache (the server owns the collection's storage)
+    """
+    asyncio.run(chroma_server_writer_async(document_queue, rag_dir))
+
+def enqueue_documents(document_queue, documents, writer):
+    """
+    Put a batch on the writer queue without hanging if the writer has died
+    
+    Args:
+        document_queue: multiprocessing.Queue feeding chroma_writer
+        documents: ChunkBatch of document chunks, or None to stop the writer
+        writer: The chroma_writer process
+    """
+    while True:
+        try:
+            document_queue.put(documents, timeout=1)
+            return
+        except queue.Full:
+            if not writer.is_alive():
+                raise RuntimeError("ChromaDB writer process exited unexpectedly")
+
+# --- FAISS Index ---
+
+def faiss_writer(document_queue, rag_dir):
+    """
+    Consumer process that embeds document batches into a FAISS HNSW index
+    
+    Embeddings are collected as batches arrive and bulk-added to the index
+    once the queue is drained. Chunk metadata and text are written to a
+    JSONL sidecar whose line order matches the index rows.
+    
+    Args:
+        document_queue: multiprocessing.Queue of ChunkBatch objects
+        rag_dir: Directory for the index files and the embedding cache
+    """
+    index_file = os.path.join(rag_dir, os.path.basename(FAISS_INDEX_FILE))
+    metadata_path = os.path.join(rag_dir, os.path.basename(FAISS_METADATA_FILE))
+    model = load_embedding_model()
+    embedding_cache = open_embedding_cache(embedding_cache_path(rag_dir))
+    all_embeddings = []
+    
+    try:
+        with open(metadata_path, "w", encoding="utf-8") as metadata_file:
+            while True:
+                documents = document_queue.get()
+                if documents is None:
+                    break
+                
+                print(f"\nEmbedding {len(documents)} document chunks for FAISS...")
+                all_embeddings.append(embed_texts_cached(model, documents.texts, embedding_cache, show_progress_bar=True))
+                for metadata, text in zip(documents.metadatas(), documents.texts):
+                    metadata["text"] = text
+                    metadata_file.write(json.dumps(metadata) + "\n")
+    finally:
+        embedding_cache.close()
+    
+    if not all_embeddings:
+        print("No documents to add to the FAISS index.")
+        # Don't leave an index from a previous run pointing at the new metadata
+        if os.path.exists(index_file):
+            os.remove(index_file)
+        return
+    
+    embeddings = np.ascontiguousarray(np.vstack(all_embeddings), dtype=np.float32)
+    
+    # Embeddings are normalized, so inner product is cosine similarity
+    print(f"\nBuilding FAISS HNSW index for {len(embeddings)} vectors...")
+    dimension = embeddings.shape[1]
+    if FAISS_INT8:
+        index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        # The quantizer learns per-dimension ranges from the data
+        index.train(embeddings)
+    else:
+        index = faiss.IndexHNSWFlat(dimension, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+    index.add(embeddings)
+    faiss.write_index(index, index_file)
+    print(f"Saved FAISS index to: {index_file}")
+
+def query_faiss_index(query_text, model, n_results=3, rag_dir=RAG_DIR):
+    """
+    Query the saved FAISS index
+    
+    Args:
+        query_text: Text to search for
+        model: SentenceTransformer model used to embed the query
+        n_results: Number of results to return
+        rag_dir: Directory the index files were written to
+        
+    Returns:
+        Results dictionary in the same shape as a ChromaDB query result,
+        with cosine distances like a cosine-space collection
+    """
+    index = faiss.read_index(os.path.join(rag_dir, os.path.basename(FAISS_INDEX_FILE)))
+    with open(os.path.join(rag_dir, os.path.basename(FAISS_METADATA_FILE)), "r", encoding="utf-8") as metadata_file:
+        records = [json.loads(line) for line in metadata_file]
+    
+    scores, rows = index.search(embed_texts(model, [query_text]).astype(np.float32), n_results)
+    hits = [(records[row], float(score)) for row, score in zip(rows[0], scores[0]) if row != -1]
+    
+    return {
+        "documents": [[record["text"] for record, _ in hits]],
+        "metadatas": [[{"file_name": record["file_name"], "chunk_id": record["chunk_id"], "page": record["page"]}
+                       for record, _ in hits]],
+        "distances": [[1.0 - score for _, score in hits]]
+    }
+
+# --- Test Queries ---
+
+def test_query(collection, model):
     """
     Run a test query against the ChromaDB collection
     
     Args:
         collection: ChromaDB collection
+        model: SentenceTransformer model used to embed the query
     """
     if collection.count() == 0:
         print("\nChromaDB collection is empty, cannot perform a query.")
@@ -241,10 +786,37 @@ def test_query(collection):
     print(f"\nRunning test query: '{query_text}'")
     
     results = collection.query(
-        query_texts=[query_text],
+        query_embeddings=embed_texts(model, [query_text]),
         n_results=3  # Get top 3 results
     )
     
+    print_query_results(query_text, results)
+
+def test_query_faiss(model, rag_dir=RAG_DIR):
+    """
+    Run a test query against the FAISS index
+    
+    Args:
+        model: SentenceTransformer model used to embed the query
+        rag_dir: Directory the index files were written to
+    """
+    if not os.path.exists(os.path.join(rag_dir, os.path.basename(FAISS_INDEX_FILE))):
+        print("\nFAISS index is empty, cannot perform a query.")
+        return
+    
+    query_text = "What are Cisco's AI principles?"
+    print(f"\nRunning test query: '{query_text}'")
+    
+    print_query_results(query_text, query_faiss_index(query_text, model, rag_dir=rag_dir))
+
+def print_query_results(query_text, results):
+    """
+    Print the results of a test query
+    
+    Args:
+        query_text: The query that was run
+        results: ChromaDB-style query results dictionary
+    """
     print("\nQuery Results:")
     if results and 'documents' in results and results['documents']:
         for i, doc_list in enumerate(results['documents']):
@@ -254,11 +826,11 @@ def test_query(collection):
                 print(f"    Document: {results.get('metadatas', [[]])[i][j].get('file_name', 'Unknown')}")
                 print(f"    Chunk ID: {results.get('metadatas', [[]])[i][j].get('chunk_id', 'Unknown')}")
                 
-                # Display distance as similarity (if available)
+                # Display cosine distance as similarity (if available)
                 if 'distances' in results and results['distances'] and i < len(results['distances']):
                     distance = results['distances'][i][j]
-                    similarity = distance if distance > 0 else 1.0 + distance
-                    print(f"    Relevance: {abs(similarity):.2%}")
+                    similarity = 1.0 - distance
+                    print(f"    Relevance: {similarity:.2%}")
                 
                 # Display a preview of the text (first 300 characters)
                 preview = doc[:300].replace("\n", " ").strip()
@@ -276,17 +848,54 @@ def create_rag_database_from_pdfs():
     os.makedirs(RAG_DIR, exist_ok=True)
     os.makedirs(TXT_DIR, exist_ok=True)
     
-    # Process PDF files
-    documents = process_pdf_files(PDF_DIR, TXT_DIR)
+    if VECTOR_STORE == "faiss" and not FAISS_AVAILABLE:
+        print("Error: VECTOR_STORE is 'faiss' but faiss is not installed (pip install faiss-cpu).")
+        return
     
-    # Setup ChromaDB
-    chroma_client, collection = setup_chroma_db(RAG_DIR)
+    # Start the writer process - it sets up the vector store and loads the
+    # embedding model while this process extracts and chunks the PDFs
+    if VECTOR_STORE == "faiss":
+        writer_target = faiss_writer
+    elif CHROMA_HOST:
+        writer_target = chroma_server_writer
+    else:
+        writer_target = chroma_writer
+    document_queue = mp.Queue(maxsize=WRITER_QUEUE_SIZE)
+    writer = mp.Process(target=writer_target, args=(document_queue, RAG_DIR))
+    writer.start()
+    
+    try:
+        # Stream chunks to the writer in add-sized batches as PDFs finish
+        documents = ChunkBatch()
+        for chunks in process_pdf_files(PDF_DIR, TXT_DIR):
+            documents.extend(chunks)
+            start = 0
+            while len(documents) - start >= ADD_BATCH_SIZE:
+                enqueue_documents(document_queue, documents.slice(start, start + ADD_BATCH_SIZE), writer)
+                start += ADD_BATCH_SIZE
+            documents = documents.slice(start, len(documents))
+        
+        if documents:
+            enqueue_documents(document_queue, documents, writer)
+    finally:
+        if writer.is_alive():
+            enqueue_documents(document_queue, None, writer)
+        writer.join()
     
-    # Add documents to ChromaDB
-    add_documents_to_chroma(collection, documents)
+    if writer.exitcode != 0:
+        print(f"Error: {VECTOR_STORE} writer exited with code {writer.exitcode}")
+        return
     
     # Test query
-    test_query(collection)
+    if VECTOR_STORE == "faiss":
+        test_query_faiss(load_embedding_model(), RAG_DIR)
+    else:
+        if CHROMA_HOST:
+            chroma_client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+        else:
+            chroma_client = chromadb.PersistentClient(path=RAG_DIR)
+        collection = chroma_client.get_collection(name=COLLECTION_NAME)
+        test_query(collection, load_embedding_model())
     
     print("\nRAG database creation complete!")
     print(f"- PDF text files saved to: {TXT_DIR}")
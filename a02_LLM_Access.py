@@ -3,11 +3,53 @@
 LLM Access Module - Enhanced version using new architecture.
 
 This module provides backward compatibility while using the new LLM client.
+call_llm is not cached here; the stages that reuse LLM output (image prompts
+and speaker notes) keep their own per-slide caches and key them with
+llm_cache_settings().
 """
 
+import os
+
 # Import the new LLM client for backward compatibility
 from llm_client import call_llm
 
+# llm_client sends requests with config.DEFAULT_MODEL unless a model is passed
+try:
+    from config import config as llm_config
+except ImportError:
+    llm_config = None
+
+# Set LLM_CACHE_ENABLED=false to always request fresh output from the LLM
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+def llm_cache_settings(model=None, temperature=None):
+    """
+    Get the LLM settings that cached output must have been generated with
+
+    The model is the one passed to call_llm, or else config.DEFAULT_MODEL
+    (the model llm_client uses). OpenRouter model names include the provider,
+    so a provider change changes the key too. Output sampled at a temperature
+    above 0 is not cached, since callers asking for sampling expect a
+    different response each time.
+
+    Args:
+        model: Model passed to call_llm, if any
+        temperature: Temperature passed to call_llm, if any
+
+    Returns:
+        Dictionary of the model and temperature to include in cache keys, or
+        None if LLM output must not be cached (caching is disabled, the model
+        can't be determined, or the output is sampled)
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    model = model or getattr(llm_config, "DEFAULT_MODEL", None)
+    if not model:
+        return None
+    if temperature is not None and temperature > 0:
+        return None
+    return {"model": model, "temperature": temperature}
+
 # Example usage
 if __name__ == "__main__":
     response = call_llm("Explain how vector databases work in RAG applications in 3 paragraphs")
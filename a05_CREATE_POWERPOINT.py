@@ -11,43 +11,41 @@ import time
 import os
 import sys
 import re
+import io
 import json
+import functools
+import itertools
+import shutil
 import traceback
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.dml.color import RGBColor
+import importlib.util
+from dataclasses import dataclass
 import concurrent.futures
-
-# Import our custom slide snapshot generator
-from a07_Slide_Snapshot_Generator import generate_snapshots_for_presentation
-from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
-from pptx.dml.color import RGBColor
 import random
 import math
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
 
-# Import image generation and speaker notes modules
-from a06_Image_Generation import generate_image_for_slide, get_enhanced_prompt, generate_all_image_prompts
-from arunware_image_generator import generate_images_parallel
+# Heavy dependencies (python-pptx, PIL, the image/snapshot/LLM modules) are
+# imported inside the functions that use them, so importing this module for
+# a helper like parse_outline - or in a worker process - stays cheap
 
-# Import speaker notes generation module
+# orjson parses large notes files faster; the stdlib json module is the fallback
 try:
-    from a06_Student_Notes_Student_Handbook import process_presentation_with_notes
-    SPEAKER_NOTES_AVAILABLE = True
+    import orjson
+    _json_loads = orjson.loads
 except ImportError:
-    print("Speaker notes module not available.")
-    SPEAKER_NOTES_AVAILABLE = False
-
-# Import the LLM access module
-import importlib.util
-import sys
+    _json_loads = json.loads
 
-# Import the LLM module dynamically (renamed file with 'a' prefix)
-llm_spec = importlib.util.spec_from_file_location("llm_module", "a02_LLM_Access.py")
-llm_module = importlib.util.module_from_spec(llm_spec)
-sys.modules["llm_module"] = llm_module
-llm_spec.loader.exec_module(llm_module)
-call_llm = llm_module.call_llm
+def __getattr__(name):
+    """Load call_llm from a02_LLM_Access.py on first access"""
+    if name == "call_llm":
+        # Import the LLM module, reusing it if another pipeline module already loaded it
+        llm_module = sys.modules.get("llm_module")
+        if llm_module is None:
+            import a02_LLM_Access as llm_module
+            sys.modules["llm_module"] = llm_module
+        globals()["call_llm"] = llm_module.call_llm
+        return llm_module.call_llm
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Constants for enhanced notes
 ENHANCED_NOTES_FILE = "06_Enhanced_Notes.txt"
@@ -66,23 +64,30 @@ def load_enhanced_notes(notes_file):
     print(f"Loading enhanced speaker notes from {notes_file}...")
     
     try:
-        with open(notes_file, 'r') as f:
+        with open(notes_file, 'rb') as f:
             content = f.read()
-            # Check if the file is in JSON format
+        
+        # Check if the file is in JSON format
+        if content.lstrip()[:1] in (b'{', b'['):
             try:
-                notes_data = json.loads(content)
+                notes_data = _json_loads(content)
                 print(f"Loaded {len(notes_data)} enhanced speaker notes entries.")
                 return notes_data
-            except json.JSONDecodeError:
-                # If it's not valid JSON, try to extract JSON from the content
-                json_match = re.search(r'```json\n(.+?)\n```', content, re.DOTALL)
-                if json_match:
-                    notes_data = json.loads(json_match.group(1))
-                    print(f"Extracted and loaded {len(notes_data)} enhanced speaker notes entries.")
-                    return notes_data
-                else:
-                    print("Error: Could not parse enhanced speaker notes as JSON.")
-                    return {}
+            except ValueError:
+                pass
+        
+        # If it's not valid JSON, try to extract JSON from a ```json block
+        json_start = content.find(b'```json')
+        if json_start >= 0:
+            json_start += len(b'```json')
+            json_end = content.find(b'```', json_start)
+            if json_end > json_start:
+                notes_data = _json_loads(content[json_start:json_end])
+                print(f"Extracted and loaded {len(notes_data)} enhanced speaker notes entries.")
+                return notes_data
+        
+        print("Error: Could not parse enhanced speaker notes as JSON.")
+        return {}
     except FileNotFoundError:
         print(f"Enhanced speaker notes file not found at {notes_file}")
         return {}
@@ -90,6 +95,40 @@ def load_enhanced_notes(notes_file):
         print(f"Error loading enhanced speaker notes: {str(e)}")
         return {}
 
+# Key prefixes the notes LLM tends to add, ignored when matching notes to slides
+NOTES_KEY_PREFIXES = ("course:", "module:", "title:")
+
+def normalize_notes_key(key):
+    """Lowercase a notes key or slide title and strip any "Course:"-style prefix"""
+    key = key.strip().lower()
+    for prefix in NOTES_KEY_PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):].strip()
+    return key
+
+def build_enhanced_notes_index(notes_data):
+    """
+    Build a lookup from normalized slide titles to speaker notes.
+    
+    Each entry is indexed under its lowercased key, its key without a
+    "Course:"/"Module:"/"Title:" prefix, and both without "Fundamentals",
+    so slides find their notes with a single dictionary lookup.
+    
+    Args:
+        notes_data: Dictionary mapping slide titles to speaker notes
+        
+    Returns:
+        Dictionary mapping normalized keys to speaker notes
+    """
+    index = {}
+    for key, notes in notes_data.items():
+        lowered = key.strip().lower()
+        normalized = normalize_notes_key(key)
+        for form in (lowered, normalized, normalized.replace(" fundamentals", "")):
+            # The first entry for a form wins, like the first matching key did
+            index.setdefault(form, notes)
+    return index
+
 # Define constants
 OUTLINE_FILE = "course_outline.txt"
 OUTPUT_PPTX = "course_presentation.pptx"
@@ -122,6 +161,9 @@ CURRENT_DIR = get_current_directory()
 # Testing limit
 MAX_SLIDES_TO_PROCESS = 50
 
+# Minimum seconds between "Processed N slides" progress lines
+PROGRESS_LOG_INTERVAL = 0.5
+
 # Function to reset and manage the slide counter
 def reset_slide_counter():
     global SLIDES_PROCESSED
@@ -132,23 +174,126 @@ SLIDES_PROCESSED = 0  # Counter to track total slides generated
 
 # Define PowerPoint generation constants
 
-# Define colors
+# Define colors (RGB tuples - wrap in pptx RGBColor where they are applied)
 COLORS = {
-    "module_title": RGBColor(0, 32, 96),     # Dark blue
-    "topic_title": RGBColor(0, 112, 192),    # Medium blue
-    "subtopic_title": RGBColor(0, 176, 240), # Light blue
-    "bullet_text": RGBColor(0, 0, 0),         # Black
-    "background": RGBColor(255, 255, 255),  # White
-    "title": RGBColor(0, 68, 129),          # Cisco Blue
-    "accent1": RGBColor(0, 155, 229),       # Light blue
-    "accent2": RGBColor(100, 195, 84),      # Green
-    "accent3": RGBColor(206, 59, 50)        # Red/orange
+    "module_title": (0, 32, 96),     # Dark blue
+    "topic_title": (0, 112, 192),    # Medium blue
+    "subtopic_title": (0, 176, 240), # Light blue
+    "bullet_text": (0, 0, 0),         # Black
+    "background": (255, 255, 255),  # White
+    "title": (0, 68, 129),          # Cisco Blue
+    "accent1": (0, 155, 229),       # Light blue
+    "accent2": (100, 195, 84),      # Green
+    "accent3": (206, 59, 50)        # Red/orange
 }
 
 # Constants for title slide image generation
 TITLE_IMAGE_WIDTH = 1600
 TITLE_IMAGE_HEIGHT = 900  # 16:9 aspect ratio
 
+# Fonts to try for the title slide image, in order of preference
+SYSTEM_FONTS = [
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Georgia.ttf"
+]
+
+@functools.lru_cache(maxsize=1)
+def _find_font_path():
+    """Return the first available font in SYSTEM_FONTS, or None (cached for the run)"""
+    # List each font directory once instead of stat-ing every candidate
+    dir_entries = {}
+    for font_dir in {os.path.dirname(font) for font in SYSTEM_FONTS}:
+        try:
+            with os.scandir(font_dir) as entries:
+                dir_entries[font_dir] = {entry.name for entry in entries}
+        except OSError:
+            dir_entries[font_dir] = set()
+    
+    return next((font for font in SYSTEM_FONTS
+                 if os.path.basename(font) in dir_entries[os.path.dirname(font)]), None)
+
+@functools.lru_cache(maxsize=16)
+def _get_font(size):
+    """Load the title-image font at the given size, falling back to the default font.
+    
+    Cached so the font file is only parsed once per size, not once per image.
+    """
+    from PIL import ImageFont
+    
+    font_path = _find_font_path()
+    try:
+        if font_path:
+            return ImageFont.truetype(font_path, size)
+    except Exception as e:
+        print(f"Error loading font: {e}")
+    # Fallback to default
+    return ImageFont.load_default()
+
+def _text_width(font, text):
+    """Return the rendered width of text in pixels"""
+    # Use getbbox to get text size
+    if hasattr(font, 'getbbox'):
+        return font.getbbox(text)[2]
+    # Fallback method for older PIL versions
+    return font.getmask(text).getbbox()[2]
+
+def _blend_ring(pixels, cx, cy, radius, width, alpha):
+    """Blend a white circle outline into an (H, W, 3) uint8 array in place.
+    
+    Only the circle's bounding box is touched, and the ring is a boolean
+    distance mask, so each circle is a couple of vectorized operations.
+    """
+    height, img_width = pixels.shape[:2]
+    top, bottom = max(cy - radius, 0), min(cy + radius + 1, height)
+    left, right = max(cx - radius, 0), min(cx + radius + 1, img_width)
+    if top >= bottom or left >= right:
+        return
+    
+    ys, xs = np.ogrid[top:bottom, left:right]
+    dist_sq = (xs - cx) ** 2 + (ys - cy) ** 2
+    inner = max(radius - width, 0)
+    ring = (dist_sq <= radius * radius) & (dist_sq > inner * inner)
+    
+    window = pixels[top:bottom, left:right]
+    window[ring] = (window[ring] * (1 - alpha) + 255 * alpha).astype(np.uint8)
+
+@functools.lru_cache(maxsize=1)
+def _build_title_background():
+    """Render the title image background (gradient and circles) once per process.
+    
+    Callers must copy() the returned image before drawing on it.
+    """
+    from PIL import Image
+    
+    # Create a nice gradient background (from dark blue to lighter blue)
+    # Build one column of row colors and broadcast it across the width
+    # (endpoint=False keeps the last row one step short of the end color)
+    gradient = np.stack([
+        np.zeros(TITLE_IMAGE_HEIGHT, dtype=np.uint8),
+        np.linspace(32, 155, TITLE_IMAGE_HEIGHT, endpoint=False, dtype=np.uint8),
+        np.linspace(96, 229, TITLE_IMAGE_HEIGHT, endpoint=False, dtype=np.uint8)
+    ], axis=1)
+    
+    pixels = np.ascontiguousarray(
+        np.broadcast_to(gradient[:, np.newaxis, :], (TITLE_IMAGE_HEIGHT, TITLE_IMAGE_WIDTH, 3))
+    )
+    
+    # Add a decorative element (abstract shapes)
+    # Draw some circles in the background
+    for _ in range(10):
+        # Random position and size
+        x = random.randint(0, TITLE_IMAGE_WIDTH)
+        y = random.randint(0, TITLE_IMAGE_HEIGHT)
+        size = random.randint(100, 400)
+        
+        # Semi-transparent white
+        opacity = random.randint(30, 80)
+        _blend_ring(pixels, x, y, size // 2, 3, opacity / 255)
+    
+    return Image.fromarray(pixels)
+
 def generate_title_slide_image(title_text, output_dir, subtitle_text="Generated Course Presentation"):
     """Generate a professional title slide image based on the course title.
     
@@ -160,75 +305,24 @@ def generate_title_slide_image(title_text, output_dir, subtitle_text="Generated
     Returns:
         Path to the generated title slide image
     """
+    from PIL import ImageDraw
+    
     # Create the output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     # Path for the generated title image
     title_image_path = os.path.join(output_dir, "title_slide_image.png")
     
-    # Create a blank image with a gradient background
-    img = Image.new('RGB', (TITLE_IMAGE_WIDTH, TITLE_IMAGE_HEIGHT), color=(255, 255, 255))
+    # Start from the shared background and only draw the text
+    img = _build_title_background().copy()
     draw = ImageDraw.Draw(img)
     
-    # Create a nice gradient background (from dark blue to lighter blue)
-    for y in range(TITLE_IMAGE_HEIGHT):
-        # Calculate gradient color (from dark blue to light blue)
-        progress = y / TITLE_IMAGE_HEIGHT
-        r = int(0 + (0 * progress))
-        g = int(32 + (123 * progress))
-        b = int(96 + (133 * progress))
-        
-        # Draw a horizontal line with this color
-        draw.line([(0, y), (TITLE_IMAGE_WIDTH, y)], fill=(r, g, b))
-    
     # Try to load a nice font, fallback to default if not available
     title_font_size = 80
     subtitle_font_size = 40
     
-    try:
-        # Try to find a nice font on the system
-        system_fonts = [
-            "/System/Library/Fonts/Supplemental/Arial.ttf",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "/Library/Fonts/Arial.ttf",
-            "/System/Library/Fonts/Supplemental/Georgia.ttf"
-        ]
-        
-        font_path = None
-        for font in system_fonts:
-            if os.path.exists(font):
-                font_path = font
-                break
-        
-        if font_path:
-            title_font = ImageFont.truetype(font_path, title_font_size)
-            subtitle_font = ImageFont.truetype(font_path, subtitle_font_size)
-        else:
-            # Fallback to default
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            
-    except Exception as e:
-        print(f"Error loading font: {e}")
-        # Fallback to default
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
-    
-    # Add a decorative element (abstract shapes)
-    # Draw some circles in the background
-    for _ in range(10):
-        # Random position and size
-        x = random.randint(0, TITLE_IMAGE_WIDTH)
-        y = random.randint(0, TITLE_IMAGE_HEIGHT)
-        size = random.randint(100, 400)
-        
-        # Semi-transparent white
-        opacity = random.randint(30, 80)
-        circle_color = (255, 255, 255, opacity)
-        
-        # Draw circle
-        draw.ellipse((x-size//2, y-size//2, x+size//2, y+size//2), 
-                     fill=None, outline=circle_color, width=3)
+    title_font = _get_font(title_font_size)
+    subtitle_font = _get_font(subtitle_font_size)
     
     # Add title text (centered horizontally, positioned in upper half)
     title_y = TITLE_IMAGE_HEIGHT // 3
@@ -238,35 +332,28 @@ def generate_title_slide_image(title_text, output_dir, subtitle_text="Generated
     words = title_text.split()
     lines = []
     current_line = []
+    current_width = 0
     
-    # Simple text wrapping logic
-    for word in words:
-        test_line = ' '.join(current_line + [word])
-        # Use getbbox to get text size
-        if hasattr(title_font, 'getbbox'):
-            text_width = title_font.getbbox(test_line)[2]
-        else:
-            # Fallback method for older PIL versions
-            text_width = title_font.getmask(test_line).getbbox()[2]
-            
-        if text_width <= max_width:
+    # Simple text wrapping logic - measure each word once and pack by width
+    word_widths = [_text_width(title_font, word) for word in words]
+    space_width = _text_width(title_font, "a a") - _text_width(title_font, "aa")
+    
+    for word, word_width in zip(words, word_widths):
+        line_width = current_width + space_width + word_width if current_line else word_width
+        if line_width <= max_width or not current_line:
             current_line.append(word)
+            current_width = line_width
         else:
             lines.append(' '.join(current_line))
             current_line = [word]
+            current_width = word_width
     
     if current_line:
         lines.append(' '.join(current_line))
     
     # Draw each line of the title
     for i, line in enumerate(lines):
-        # Use getbbox to get text size
-        if hasattr(title_font, 'getbbox'):
-            text_width = title_font.getbbox(line)[2]
-        else:
-            # Fallback method for older PIL versions
-            text_width = title_font.getmask(line).getbbox()[2]
-            
+        text_width = _text_width(title_font, line)
         text_x = (TITLE_IMAGE_WIDTH - text_width) // 2
         # Add white text with a slight offset for shadow effect
         draw.text((text_x+2, title_y+2+i*title_font_size), line, font=title_font, fill=(0, 0, 0, 100))
@@ -275,13 +362,7 @@ def generate_title_slide_image(title_text, output_dir, subtitle_text="Generated
     # Add subtitle
     subtitle_y = title_y + (len(lines) * title_font_size) + 40
     
-    # Use getbbox to get text size
-    if hasattr(subtitle_font, 'getbbox'):
-        subtitle_width = subtitle_font.getbbox(subtitle_text)[2]
-    else:
-        # Fallback method for older PIL versions
-        subtitle_width = subtitle_font.getmask(subtitle_text).getbbox()[2]
-        
+    subtitle_width = _text_width(subtitle_font, subtitle_text)
     subtitle_x = (TITLE_IMAGE_WIDTH - subtitle_width) // 2
     
     # Add subtitle text with shadow
@@ -300,21 +381,28 @@ def generate_title_slide_image(title_text, output_dir, subtitle_text="Generated
         # Convert to RGB mode if it has alpha channel
         if img.mode == 'RGBA':
             img = img.convert('RGB')
-        img.save(title_image_path)
+        # Fast deflate level - the smooth gradient compresses well anyway,
+        # and python-pptx embeds the bytes as-is
+        img.save(title_image_path, format='PNG', compress_level=1)
         print(f"Generated title slide image: {title_image_path}")
         return title_image_path
     except Exception as e:
         print(f"Error saving title slide image: {e}")
         return None
 
-def create_title_slide(prs, title_text, image_path=None):
+def create_title_slide(prs, title_text, notes, notes_index, image_path=None):
     """Create the title slide for the presentation using Title Slide Layout.
     
     Args:
         prs: PowerPoint presentation object
         title_text: Title text for the slide
+        notes: Enhanced notes as loaded by load_enhanced_notes
+        notes_index: Index built from the notes by build_enhanced_notes_index
         image_path: Optional path to an image to include on the title slide
     """
+    from pptx.util import Pt
+    from pptx.dml.color import RGBColor
+    
     # Extract course name from title_text
     course_name = title_text
     # Find the Title Slide Layout (typically index 0)
@@ -352,7 +440,7 @@ def create_title_slide(prs, title_text, image_path=None):
         title_format = title.text_frame.paragraphs[0].font
         title_format.size = Pt(44)
         title_format.bold = True
-        title_format.color.rgb = COLORS["module_title"]
+        title_format.color.rgb = RGBColor(*COLORS["module_title"])
     
     if subtitle:
         subtitle.text = "Generated Course Presentation"
@@ -404,38 +492,24 @@ def create_title_slide(prs, title_text, image_path=None):
     
     # Add speaker notes to the title slide from enhanced notes if available
     try:
-        # Try to get notes from global enhanced_notes dictionary
+        # Try to get notes from the enhanced notes index
         found_notes = False
-        if 'enhanced_notes' in globals() and enhanced_notes:
-            # Try variations of the title to find a match in the enhanced notes
-            course_variants = [
-                course_name,
-                f"Course: {course_name}", 
-                "Course: Cisco AI Defense",  # Special case from what we observed
-                f"Title: {course_name}",
-                "Title Slide"
-            ]
-            
-            # Also try variations without "Fundamentals" if present
-            base_name = course_name.replace(" Fundamentals", "")
-            if base_name != course_name:
-                course_variants.append(base_name)
-                course_variants.append(f"Course: {base_name}")
-            
-            # Try all variant keys
-            for key in course_variants:
-                if key in enhanced_notes:
-                    welcome_notes = enhanced_notes[key]
+        if notes_index:
+            # The index already covers "Course:"/"Title:" prefixes, case and "Fundamentals"
+            course_key = normalize_notes_key(course_name)
+            for key in (course_key, course_key.replace(" fundamentals", ""), "title slide"):
+                if key in notes_index:
+                    welcome_notes = notes_index[key]
                     slide.notes_slide.notes_text_frame.text = welcome_notes
                     print(f"Added enhanced speaker notes to title slide using key: '{key}'")
                     found_notes = True
                     break
             
-            # Special handling: try getting the first key in enhanced_notes if it looks like a title
-            if not found_notes and enhanced_notes:
-                for key in enhanced_notes.keys():
+            # Special handling: try getting the first key in the notes if it looks like a title
+            if not found_notes and notes:
+                for key in notes.keys():
                     if key.lower().startswith("course:") or "title" in key.lower():
-                        welcome_notes = enhanced_notes[key]
+                        welcome_notes = notes[key]
                         slide.notes_slide.notes_text_frame.text = welcome_notes
                         print(f"Added enhanced speaker notes to title slide using key: '{key}'")
                         found_notes = True
@@ -447,7 +521,7 @@ def create_title_slide(prs, title_text, image_path=None):
                 welcome_notes = f"Welcome to the course: {course_name}. This comprehensive course will provide you with in-depth knowledge and practical skills about {course_name}. Throughout this course, you will learn key concepts, best practices, and hands-on techniques that you can apply in real-world scenarios. Let's begin our journey into {course_name}."
                 slide.notes_slide.notes_text_frame.text = welcome_notes
                 print(f"Added fallback speaker notes to title slide (enhanced notes not found)")
-                print(f"Available keys were: {list(enhanced_notes.keys())}")
+                print(f"Available keys were: {list(notes.keys())}")
         else:  # No enhanced notes available
             # Generate fallback notes
             welcome_notes = f"Welcome to the course: {course_name}. This comprehensive course will provide you with in-depth knowledge and practical skills about {course_name}. Throughout this course, you will learn key concepts, best practices, and hands-on techniques that you can apply in real-world scenarios. Let's begin our journey into {course_name}."
@@ -458,26 +532,36 @@ def create_title_slide(prs, title_text, image_path=None):
     
     return slide
 
-def create_content_slide(prs, title_text, bullet_points, title_color=None, generate_images=True, image_path=None):
-    """Create a content slide with title and bullet points."""
+def create_content_slide(prs, title_text, bullet_points, notes_index, title_color=None, generate_images=True,
+                         image_path=None, image_bytes=None):
+    """Create a content slide with title and bullet points.
+    
+    image_bytes, if given, is the already-read content of the slide image and
+    is used instead of image_path. notes_index is the enhanced notes index from
+    build_enhanced_notes_index.
+    """
+    from pptx.util import Inches, Pt
+    from pptx.dml.color import RGBColor
+    from a06_Image_Generation import generate_image_for_slide
+    
     # Use the content slide layout
     slide_layout = prs.slide_layouts[1]  # Layout index 1 is for Title and Content
     slide = prs.slides.add_slide(slide_layout)
     
     # If no title color specified, use default color
     if title_color is None:
-        title_color = COLORS.get("title", RGBColor(0, 68, 129))  # Default to Cisco blue
+        title_color = COLORS.get("title", (0, 68, 129))  # Default to Cisco blue
     
     # Set the title
     title = slide.shapes.title
     title.text = title_text
-    all_slide_text = ""
-    all_slide_text += title_text
+    # Slide text for image prompts: the title followed by each bullet point
+    all_slide_text = "\n".join([title_text, *(bullet_points or [])])
     # Format title
     title_format = title.text_frame.paragraphs[0].font
     title_format.size = Pt(40)
     title_format.bold = True
-    title_format.color.rgb = title_color
+    title_format.color.rgb = RGBColor(*title_color)
     
     # Add bullet points if there are any
     if bullet_points:
@@ -492,25 +576,28 @@ def create_content_slide(prs, title_text, bullet_points, title_color=None, gener
                 paragraph = text_frame.add_paragraph()
                 
             paragraph.text = point
-            all_slide_text += "\n" + point
             paragraph.level = 0  # Top level bullet
             
             # Format bullet text
             font = paragraph.font
             font.size = Pt(28)
-            font.color.rgb = COLORS["bullet_text"]
+            font.color.rgb = RGBColor(*COLORS["bullet_text"])
     
     # Use provided image_path if available, otherwise generate if enabled
     selected_image = None
     
-    if image_path and os.path.exists(image_path):
+    if image_bytes is not None:
+        # Use the pre-generated image, read ahead by the caller
+        selected_image = io.BytesIO(image_bytes)
+        print(f"Using pre-generated image for slide: {title_text}")
+    elif image_path and os.path.exists(image_path):
         # Use the pre-generated image
         selected_image = image_path
         print(f"Using pre-generated image for slide: {title_text}")
     elif generate_images:
-        print(f"Generating new image for slide: {title_text}")
         try:
-            # Generate images for this slide
+            print(f"Generating new image for slide: {title_text}")
+            # Generate images for this slide (stored images are reused by a06)
             image_paths = generate_image_for_slide(title_text, all_slide_text)
             
             # If images were generated successfully
@@ -560,18 +647,13 @@ def create_content_slide(prs, title_text, bullet_points, title_color=None, gener
             if ":" in module_name:
                 module_name = module_name.split(":")[1].strip()
         
-        # Try to get notes from global enhanced_notes dictionary
-        if 'enhanced_notes' in globals() and enhanced_notes:
-            # Try variations of the title for better matching
-            possible_keys = [title_text, f"{title_text}", title_text.strip()]
-            
-            for key in possible_keys:
-                if key in enhanced_notes:
-                    slide_notes = enhanced_notes[key]
-                    slide.notes_slide.notes_text_frame.text = slide_notes
-                    print(f"Added enhanced speaker notes to slide: {title_text}")
-                    break
-            else:  # No match found in the loop
+        # Try to get notes from the enhanced notes index
+        if notes_index:
+            slide_notes = notes_index.get(normalize_notes_key(title_text))
+            if slide_notes:
+                slide.notes_slide.notes_text_frame.text = slide_notes
+                print(f"Added enhanced speaker notes to slide: {title_text}")
+            else:  # No match found
                 if "module" in title_text.lower():
                     # Generate fallback module notes
                     module_notes = f"Module: {module_name}. This module will introduce you to the key concepts and principles of {module_name}. We will explore the fundamental aspects, practical applications, and best practices related to this module topic. By the end of this module, you will have a solid understanding of {module_name} and be able to apply these concepts in various scenarios."
@@ -587,127 +669,140 @@ def create_content_slide(prs, title_text, bullet_points, title_color=None, gener
 
     return slide
 
-def parse_outline(file_path):
+# Numbered outline line: "1 Module", "1.1 Topic", "1.1.1 Subtopic", "1.1.1.1 Point".
+# A trailing dot after the number counts toward the level, as in "1.1. Title"
+OUTLINE_LINE_RE = re.compile(r'^[ \t]*(\d+(?:\.\d+){0,3})(\.?)[ \t]+(\S.*?)[ \t\r]*$', re.MULTILINE)
+
+@dataclass(slots=True)
+class SlideRec:
+    """One outline entry (module, topic or subtopic) in the flat outline list"""
+    kind: str          # "module", "topic" or "subtopic"
+    number: str        # Outline numbering, e.g. "1.2"
+    title: str
+    bullets: list      # Child titles for modules/topics, points for subtopics
+    parent_idx: int    # Index of the parent record, -1 for modules
+
+def parse_outline_records(file_path):
     """
-    Parse the course outline text file and extract modules, topics, subtopics, and points.
+    Parse the course outline text file into a flat list of slide records.
     
-    Returns a nested dictionary structure and the course title.
+    Records are in outline order; parent_idx links topics to their module and
+    subtopics to their topic. Bullets are filled in during the same pass.
+    
+    Returns:
+        Tuple of (course title, list of SlideRec)
     """
     course_title = "Course Presentation"  # Default title
     
-    with open(file_path, 'r') as f:
-        lines = f.readlines()
-    
-    # First line is the course title
-    if lines and not lines[0].strip().startswith("1."):
-        course_title = lines[0].strip()
-        lines = lines[1:]  # Remove the title line
+    slides = []
+    current_module = -1
+    current_topic = -1
+    current_subtopic = -1
     
-    # Initialize the structure
-    outline = {}
-    current_module = None
-    current_topic = None
-    current_subtopic = None
-    
-    # Process line by line
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check for different levels based on the number of parts in the numbering
-        parts = line.split(' ', 1)
-        if len(parts) < 2:
-            continue  # Skip lines without proper formatting
-            
-        number_part, title_part = parts
+    with open(file_path, 'r') as f:
+        # First line is the course title
+        first_line = f.readline()
+        lines = f
+        if not first_line or first_line.strip().startswith("1."):
+            lines = itertools.chain([first_line], f)
+        else:
+            course_title = first_line.strip()
         
-        # Check the format of the number to determine the level
-        num_dots = number_part.count('.')
+        # Stream the remaining lines, matching numbered entries one at a time
+        for line in lines:
+            match = OUTLINE_LINE_RE.match(line)
+            if not match:
+                continue
+            number_part, trailing_dot, title_part = match.groups()
+            title_part = title_part.strip()
         
-        # Remove trailing dot if present
-        number_part = number_part.rstrip('.')
+            # Check the format of the number to determine the level
+            num_dots = number_part.count('.') + len(trailing_dot)
         
-        if num_dots == 0 and number_part.isdigit():
-            # It's a module (e.g., "1 Introduction to AI Security")
-            module_number = number_part
-            current_module = f"Module {module_number}"
-            outline[current_module] = {
-                "title": title_part.strip(),
-                "topics": {}
-            }
-            current_topic = None
-            current_subtopic = None
-            print(f"Found module: {current_module} - {title_part.strip()}")
+            if num_dots == 0:
+                # It's a module (e.g., "1 Introduction to AI Security")
+                current_module = len(slides)
+                slides.append(SlideRec("module", number_part, title_part, [], -1))
+                current_topic = -1
+                current_subtopic = -1
+                print(f"Found module: Module {number_part} - {title_part}")
             
-        elif num_dots == 1:
-            # It's a topic (e.g., "1.1 AI Security Overview")
-            if not current_module:
-                # If no module has been defined yet, create a default one
-                current_module = "Module 1"
-                outline[current_module] = {
-                    "title": "Main Module",
-                    "topics": {}
-                }
-                print(f"Created default module: {current_module}")
+            elif num_dots == 1:
+                # It's a topic (e.g., "1.1 AI Security Overview")
+                if current_module < 0:
+                    # If no module has been defined yet, create a default one
+                    current_module = len(slides)
+                    slides.append(SlideRec("module", "1", "Main Module", [], -1))
+                    print("Created default module: Module 1")
                 
-            topic_number = number_part
-            current_topic = f"Topic {topic_number}"
-            outline[current_module]["topics"][current_topic] = {
-                "title": title_part.strip(),
-                "subtopics": {}
-            }
-            current_subtopic = None
-            print(f"Found topic: {current_topic} - {title_part.strip()}")
+                current_topic = len(slides)
+                slides.append(SlideRec("topic", number_part, title_part, [], current_module))
+                slides[current_module].bullets.append(title_part)
+                current_subtopic = -1
+                print(f"Found topic: Topic {number_part} - {title_part}")
             
-        elif num_dots == 2:
-            # It's a subtopic (e.g., "1.1.1 Defining AI Security")
-            if not current_module:
-                # If no module has been defined yet, create a default one
-                current_module = "Module 1"
-                outline[current_module] = {
-                    "title": "Main Module",
-                    "topics": {}
-                }
+            elif num_dots == 2:
+                # It's a subtopic (e.g., "1.1.1 Defining AI Security")
+                if current_module < 0:
+                    # If no module has been defined yet, create a default one
+                    current_module = len(slides)
+                    slides.append(SlideRec("module", "1", "Main Module", [], -1))
                 
-            if not current_topic:
-                # If no topic has been defined yet, create a default one
-                topic_prefix = number_part.split('.')[0]
-                current_topic = f"Topic {topic_prefix}.1"
-                outline[current_module]["topics"][current_topic] = {
-                    "title": "Main Topic",
-                    "subtopics": {}
-                }
+                if current_topic < 0:
+                    # If no topic has been defined yet, create a default one
+                    topic_prefix = number_part.split('.')[0]
+                    current_topic = len(slides)
+                    slides.append(SlideRec("topic", f"{topic_prefix}.1", "Main Topic", [], current_module))
+                    slides[current_module].bullets.append("Main Topic")
                 
-            subtopic_number = number_part
-            current_subtopic = f"Subtopic {subtopic_number}"
-            outline[current_module]["topics"][current_topic]["subtopics"][current_subtopic] = {
-                "title": title_part.strip(),
-                "points": []
-            }
-            print(f"Found subtopic: {current_subtopic} - {title_part.strip()}")
+                current_subtopic = len(slides)
+                slides.append(SlideRec("subtopic", number_part, title_part, [], current_topic))
+                slides[current_topic].bullets.append(title_part)
+                print(f"Found subtopic: Subtopic {number_part} - {title_part}")
             
-        elif num_dots == 3:
-            # It's a point (e.g., "1.1.1.1 Key AI Security Principle")
-            if not current_module or not current_topic or not current_subtopic:
-                # Skip if we don't have a proper hierarchy
-                continue
+            elif num_dots == 3:
+                # It's a point (e.g., "1.1.1.1 Key AI Security Principle")
+                if current_subtopic < 0:
+                    # Skip if we don't have a proper hierarchy
+                    continue
                 
-            point = title_part.strip()
-            outline[current_module]["topics"][current_topic]["subtopics"][current_subtopic]["points"].append(point)
-            
-        # Handle the case where we have modules without the "Module" prefix
-        elif num_dots == 0 and re.match(r'^\d+$', number_part):
-            # This looks like a top-level item (module)
-            module_number = number_part
-            current_module = f"Module {module_number}"
-            outline[current_module] = {
-                "title": title_part.strip(),
-                "topics": {}
-            }
-            current_topic = None
-            current_subtopic = None
-            print(f"Found simple module: {current_module} - {title_part.strip()}")
+                slides[current_subtopic].bullets.append(title_part)
+    
+    return course_title, slides
+
+def outline_from_records(slides):
+    """
+    Build the nested module/topic/subtopic dictionary from slide records.
+    
+    Returns:
+        Nested dictionary keyed "Module N" -> "Topic N.N" -> "Subtopic N.N.N".
+        Module and topic nodes also carry their bare "number" ("N", "N.N").
+    """
+    outline = {}
+    nodes = []  # Dictionary built for each record, by record index
+    
+    for rec in slides:
+        if rec.kind == "module":
+            node = {"title": rec.title, "number": rec.number, "topics": {}}
+            outline[f"Module {rec.number}"] = node
+        elif rec.kind == "topic":
+            node = {"title": rec.title, "number": rec.number, "subtopics": {}}
+            nodes[rec.parent_idx]["topics"][f"Topic {rec.number}"] = node
+        else:
+            node = {"title": rec.title, "points": rec.bullets}
+            nodes[rec.parent_idx]["subtopics"][f"Subtopic {rec.number}"] = node
+        nodes.append(node)
+    
+    return outline
+
+def parse_outline(file_path):
+    """
+    Parse the course outline text file and extract modules, topics, subtopics, and points.
+    
+    Returns a nested dictionary structure and the course title.
+    """
+    course_title, slides = parse_outline_records(file_path)
+    outline = outline_from_records(slides)
     
     # Print summary of what was found
     module_count = len(outline)
@@ -721,81 +816,76 @@ def parse_outline(file_path):
     
     return outline, course_title
 
-def prepare_slides_data(outline_data, max_slides=10):
+def prepare_slides_data(slides, max_slides=10):
     """
     Prepare data for slide generation without creating slides yet.
     This allows us to generate images in parallel before creating the slides.
     
+    The outline is counted in the same pass, so callers don't need to walk
+    the records again to report its size. Each slide's "slide_id" is the
+    index of its record in slides, which stays unique even when titles repeat.
+    
     Args:
-        outline_data: A nested dictionary containing the outline structure
+        slides: Flat list of SlideRec from parse_outline_records
         max_slides: Maximum number of slides to process
         
     Returns:
-        List of slide data dictionaries containing title, content, and color information
+        Tuple of (list of slide data dictionaries containing title, content and
+        color information, module count, topic count, subtopic count). The
+        counts cover the whole outline, not just the prepared slides.
     """
     slides_data = []
+    # Bind the list method and colors once, outside the per-record loop
+    append = slides_data.append
+    module_color = COLORS["module_title"]
+    topic_color = COLORS["topic_title"]
+    subtopic_color = COLORS["subtopic_title"]
+    module_count = 0
+    topic_count = 0
+    subtopic_count = 0
     
     # First slide will be title slide, so we don't include it here
     
-    # Process modules
-    for module, module_data in outline_data.items():
-        if not module_data.get("topics"):
-            continue
-            
-        # Module slide
-        topic_bullets = [f"{topic_data['title']}" for topic, topic_data in module_data["topics"].items()]
-        slides_data.append({
-            "title": f"{module}: {module_data['title']}",
-            "content": topic_bullets,
-            "color": COLORS["module_title"],
-            "type": "module"
-        })
-        
-        if len(slides_data) >= max_slides:
-            break
-            
-        # Process topics
-        for topic, topic_data in module_data["topics"].items():
+    for slide_id, rec in enumerate(slides):
+        if rec.kind == "module":
+            module_count += 1
+            # Modules without topics get no slide
+            if not rec.bullets or len(slides_data) >= max_slides:
+                continue
+            append({
+                "title": f"Module {rec.number}: {rec.title}",
+                "content": list(rec.bullets),
+                "color": module_color,
+                "type": "module",
+                "slide_id": slide_id,
+                "slide_num": len(slides_data) + 1  # 1-based, after the title slide
+            })
+        elif rec.kind == "topic":
+            topic_count += 1
             if len(slides_data) >= max_slides:
-                break
-                
-            # Extract topic number 
-            topic_parts = topic.split()
-            topic_number = topic_parts[1]  # Gets the number like "1.1"
-            
-            # Topic slide
-            subtopic_bullets = [f"{subtopic_data['title']}" for subtopic, subtopic_data in topic_data["subtopics"].items()]
-            slides_data.append({
-                "title": f"{topic_number}: {topic_data['title']}",
-                "content": subtopic_bullets,
-                "color": COLORS["topic_title"],
-                "type": "topic"
+                continue
+            append({
+                "title": f"{rec.number}: {rec.title}",
+                "content": list(rec.bullets),
+                "color": topic_color,
+                "type": "topic",
+                "slide_id": slide_id,
+                "slide_num": len(slides_data) + 1  # 1-based, after the title slide
             })
-            
+        else:
+            subtopic_count += 1
             if len(slides_data) >= max_slides:
-                break
-                
-            # Process subtopics
-            for subtopic, subtopic_data in topic_data["subtopics"].items():
-                if len(slides_data) >= max_slides:
-                    break
-                    
-                # Subtopic slide
-                slides_data.append({
-                    "title": f"{subtopic_data['title']}",
-                    "content": subtopic_data["points"],
-                    "color": COLORS["subtopic_title"],
-                    "type": "subtopic"
-                })
-                
-                if len(slides_data) >= max_slides:
-                    break
-        
-        # If we've reached the limit, break out of modules loop
-        if len(slides_data) >= max_slides:
-            break
+                continue
+            append({
+                "title": rec.title,
+                "content": rec.bullets,
+                "color": subtopic_color,
+                "type": "subtopic",
+                "slide_id": slide_id,
+                "slide_num": len(slides_data) + 1  # 1-based, after the title slide
+            })
     
-    return slides_data
+    return slides_data, module_count, topic_count, subtopic_count
 
 
 def generate_slide_images_parallel(slides_data, batch_size=25):
@@ -807,220 +897,267 @@ def generate_slide_images_parallel(slides_data, batch_size=25):
         batch_size: Number of images to generate in parallel
         
     Returns:
-        Dictionary mapping slide titles to image file paths
+        Dictionary mapping slide ids to image file paths
     """
-    from a06_Image_Generation import get_enhanced_prompt, IMAGE_DIR, IMAGE_WIDTH, IMAGE_HEIGHT
+    from a06_Image_Generation import generate_all_image_prompts_from_slides, prune_image_store, IMAGE_DIR
     
     print(f"\nGenerating images for {len(slides_data)} slides...")
     
-    # First, generate all enhanced prompts in a single batch using LLM
-    print("Step 1: Generating enhanced image prompts with LLM...")
-    start_time = time.time()
+    # Slide images already in the output directory are kept, like a06 does.
+    # One listing instead of a stat per slide
+    try:
+        existing_files = set(os.listdir(IMAGE_DIR))
+    except OSError:
+        existing_files = set()
+    
+    def needs_image(slide, slide_index):
+        slide_num = slide.get("slide_num", slide_index + 1)  # 1-based indexing
+        return f"{slide_num:02d}_slide.png" not in existing_files
+    
+    # Prompts are generated per batch on a background thread. Every prompt batch is
+    # queued up front and runs one LLM call at a time, so the prompts for batch N+1
+    # are being written while batch N's images are generated
+    print("Generating enhanced image prompts with LLM, one request per batch...")
+    batch_starts = range(0, len(slides_data), batch_size)
+    prompt_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    # Slides that keep their existing image don't need a prompt
+    prompt_futures = [
+        prompt_executor.submit(
+            generate_all_image_prompts_from_slides,
+            [slide for j, slide in enumerate(slides_data[i:i + batch_size]) if needs_image(slide, i + j)],
+            # Keep every batch's raw response instead of overwriting one file
+            prompts_filename=("06_Enhanced_Prompts.txt" if i == 0
+                              else f"06_Enhanced_Prompts_{i // batch_size + 1:02d}.txt")
+        )
+        for i in batch_starts
+    ]
+    prompt_executor.shutdown(wait=False)
     
-    # Convert slides_data to the format expected by the outline_data structure
-    # This is needed for batch prompt generation
-    simplified_outline = {"title": "Course Presentation", "modules": []}
-    # Group slides into temporary modules to match outline format
-    temp_module = {"title": "Content Slides", "topics": []}
-    for slide in slides_data:
-        # Create a topic for each slide
-        topic = {
-            "title": slide["title"],
-            "subtopics": [{"content": slide["content"]}]
-        }
-        temp_module["topics"].append(topic)
-    simplified_outline["modules"].append(temp_module)
-    
-    # Generate all prompts using the batch approach
-    generate_all_image_prompts(simplified_outline, max_slides=len(slides_data))
-    elapsed_time = time.time() - start_time
-    print(f"Generated all enhanced prompts in {elapsed_time:.1f} seconds")
+    image_paths_by_id = {}
+    
+    try:
+        for i, prompts_future in zip(batch_starts, prompt_futures):
+            generate_slide_image_batch(slides_data[i:i + batch_size], i, batch_size, len(slides_data),
+                                       prompts_future, image_paths_by_id, existing_files)
+    finally:
+        # Don't keep calling the LLM for batches that will never be used
+        for prompts_future in prompt_futures:
+            prompts_future.cancel()
+    
+    prune_image_store()
+    return image_paths_by_id
+
+def generate_slide_image_batch(batch, i, batch_size, slide_count, prompts_future, image_paths_by_id,
+                               existing_files=frozenset()):
+    """
+    Generate the images of one batch of slides once its prompts are ready.
+    
+    Args:
+        batch: List of dictionaries with slide information for this batch
+        i: Index of the batch's first slide in the whole slide list
+        batch_size: Number of slides per batch
+        slide_count: Number of slides in the whole slide list
+        prompts_future: Future of the batch's prompts (slide titles to prompts)
+        image_paths_by_id: Dictionary of slide ids to image paths, updated in place
+        existing_files: Names of the files already in the slide image directory
+    """
+    from a06_Image_Generation import (get_enhanced_prompt, create_fallback_prompt, fetch_stored_image,
+                                      store_images, IMAGE_DIR, IMAGE_WIDTH, IMAGE_HEIGHT)
+    from arunware_image_generator import generate_images_parallel
     
-    # Process slides in batches for image generation
-    print("\nStep 2: Generating images from enhanced prompts...")
-    image_paths_by_title = {}
+    print(f"Processing batch {i//batch_size + 1}, slides {i+1} to {min(i+batch_size, slide_count)}")
     
-    for i in range(0, len(slides_data), batch_size):
-        batch = slides_data[i:i + batch_size]
-        print(f"Processing batch {i//batch_size + 1}, slides {i+1} to {min(i+batch_size, len(slides_data))}")
+    # Wait for this batch's prompts; later batches keep generating meanwhile.
+    # If the batch's prompt request failed, its slides get fallback prompts
+    start_time = time.time()
+    try:
+        prompts_by_title = prompts_future.result()
+        print(f"Enhanced prompts ready after waiting {time.time() - start_time:.1f} seconds")
+    except Exception as e:
+        print(f"Error generating enhanced prompts for this batch: {str(e)}. Using fallback prompts.")
+        prompts_by_title = None
+    
+    # Prepare prompts and paths for this batch
+    prompts_and_paths = []
+    batch_to_generate = []
+    for j, slide in enumerate(batch):
+        # Create a safe filename
+        slide_num = slide.get("slide_num", i + j + 1)  # 1-based indexing
+        image_filename = f"{slide_num:02d}_slide.png"
+        image_path = os.path.join(IMAGE_DIR, image_filename)
         
-        # Prepare prompts and paths for this batch
-        prompts_and_paths = []
-        for slide in batch:
-            # Get enhanced prompt that was pre-generated in batch
-            all_slide_text = "\n".join(slide["content"]) if isinstance(slide["content"], list) else slide["content"]
-            prompt = get_enhanced_prompt(slide["title"], all_slide_text)
-            
-            # Create a safe filename
-            slide_num = slides_data.index(slide) + 1  # 1-based indexing
-            image_filename = f"{slide_num:02d}_slide.png"
-            image_path = os.path.join(IMAGE_DIR, image_filename)
-            
-            # Add to batch
-            prompts_and_paths.append((prompt, image_path))
+        # Keep the image this slide already has
+        if image_filename in existing_files:
+            print(f"Image already exists for slide {slide_num}: {image_path}")
+            image_paths_by_id[slide["slide_id"]] = image_path
+            continue
         
-        # Generate all images in this batch in parallel
-        start_time = time.time()
-        all_image_paths = generate_images_parallel(
-            prompts_and_paths=prompts_and_paths,
-            width=IMAGE_WIDTH,
-            height=IMAGE_HEIGHT,
-            num_images=1  # One image per slide
-        )
-        elapsed_time = time.time() - start_time
+        # Get the enhanced prompt pre-generated for this slide's title and content,
+        # so slides that share a title don't pick up each other's prompt. Slides
+        # without content are looked up in this batch's own result
+        all_slide_text = "\n".join(slide["content"]) if isinstance(slide["content"], list) else str(slide["content"])
+        if prompts_by_title is None:
+            prompt = create_fallback_prompt(slide["title"])
+        elif all_slide_text:
+            prompt = get_enhanced_prompt(slide["title"], all_slide_text)
+        else:
+            prompt = prompts_by_title.get(slide["title"]) or get_enhanced_prompt(slide["title"])
         
-        # Associate images with slides
-        successful_images = 0
-        for j, slide in enumerate(batch):
-            if j < len(all_image_paths):
-                image_paths_by_title[slide["title"]] = all_image_paths[j]
-                successful_images += 1
+        # Reuse the stored image of an identical or near-identical prompt
+        if fetch_stored_image(prompt, IMAGE_WIDTH, IMAGE_HEIGHT, image_path):
+            image_paths_by_id[slide["slide_id"]] = image_path
+            continue
         
-        print(f"Generated {successful_images}/{len(batch)} images in {elapsed_time:.1f} seconds")
+        # Add to batch
+        prompts_and_paths.append((prompt, image_path))
+        batch_to_generate.append(slide)
+    
+    if not prompts_and_paths:
+        print(f"All {len(batch)} images in this batch already exist or were found in the image store")
+        return
+    
+    # Generate all images in this batch in parallel
+    start_time = time.time()
+    all_image_paths = generate_images_parallel(
+        prompts_and_paths=prompts_and_paths,
+        width=IMAGE_WIDTH,
+        height=IMAGE_HEIGHT,
+        num_images=1  # One image per slide
+    )
+    elapsed_time = time.time() - start_time
+    
+    # Associate images with slides
+    successful_images = 0
+    for j, slide in enumerate(batch_to_generate):
+        if j < len(all_image_paths):
+            image_paths_by_id[slide["slide_id"]] = all_image_paths[j]
+            successful_images += 1
     
-    return image_paths_by_title
+    # Store the whole batch at once (its prompts are embedded in one call)
+    store_images([prompt for prompt, _ in prompts_and_paths[:successful_images]],
+                 IMAGE_WIDTH, IMAGE_HEIGHT, all_image_paths[:successful_images])
+    
+    print(f"Generated {successful_images}/{len(batch_to_generate)} images in {elapsed_time:.1f} seconds")
 
 
-def add_slides_to_presentation(prs, slides_data, image_paths_by_title):
+def _read_image_file(image_path):
+    """Read an image file for a slide, returning None if there is no usable file"""
+    if not image_path:
+        return None
+    try:
+        with open(image_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        print(f"Warning: Image file not found: {image_path}")
+        return None
+
+def add_slides_to_presentation(prs, slides_data, image_paths_by_id, notes_index):
     """
     Add content slides to the presentation using pre-generated images.
     
+    python-pptx isn't thread-safe, so slides are built in order on this thread,
+    while a thread pool reads the image files ahead of them.
+    
     Args:
         prs: PowerPoint presentation object
         slides_data: List of dictionaries with slide information
-        image_paths_by_title: Dictionary mapping slide titles to image file paths
+        image_paths_by_id: Dictionary mapping slide ids to image file paths
+        notes_index: Enhanced notes index from build_enhanced_notes_index
         
     Returns:
-        None
+        Number of content slides processed so far (SLIDES_PROCESSED)
     """
     global SLIDES_PROCESSED
     
-    for slide_data in slides_data:
-        title = slide_data["title"]
-        content = slide_data.get("content", [])
-        color = slide_data.get("color")
-        
-        # Check if we have a pre-generated image for this slide
-        image_path = None
-        if image_paths_by_title and title in image_paths_by_title:
-            image_path = image_paths_by_title[title]
-            if not os.path.exists(image_path):
-                print(f"Warning: Image file not found: {image_path}")
-                image_path = None
-        
-        # Create the slide with the image if available
-        create_content_slide(prs, title, content, title_color=color, image_path=image_path)
-        SLIDES_PROCESSED += 1
-        
-        # Show progress for large presentations
-        if SLIDES_PROCESSED % 10 == 0:
-            print(f"Processed {SLIDES_PROCESSED} slides...")
+    image_paths_by_id = image_paths_by_id or {}
+    image_paths = [image_paths_by_id.get(slide_data["slide_id"]) for slide_data in slides_data]
+    
+    last_progress_time = time.monotonic()
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        # map() yields in slide order while later files are still being read
+        for slide_data, image_bytes in zip(slides_data, executor.map(_read_image_file, image_paths)):
+            title = slide_data["title"]
+            content = slide_data.get("content", [])
+            color = slide_data.get("color")
+            
+            # Create the slide with the image if available - images were all
+            # generated up front, so don't generate any here
+            create_content_slide(prs, title, content, notes_index, title_color=color,
+                                 generate_images=False, image_bytes=image_bytes)
+            SLIDES_PROCESSED += 1
+            
+            # Show progress for large presentations, at most once per interval
+            now = time.monotonic()
+            if now - last_progress_time >= PROGRESS_LOG_INTERVAL:
+                print(f"Processed {SLIDES_PROCESSED} slides...")
+                last_progress_time = now
+    
+    print(f"\nGenerated {SLIDES_PROCESSED} content slides.")
+    return SLIDES_PROCESSED
 
-def generate_markdown(outline_data, output_path, course_title="Course Presentation", image_paths_by_title=None):
+def generate_markdown(slides, output_path, course_title="Course Presentation", image_paths_by_id=None):
     """
-    Generate a Markdown version of the presentation from the outline data.
+    Generate a Markdown version of the presentation from the outline records.
     
     Args:
-        outline_data: A nested dictionary containing the outline structure
+        slides: Flat list of SlideRec from parse_outline_records
         output_path: Path where the Markdown file will be saved
         course_title: Title of the course for the title slide
-        image_paths_by_title: Dictionary mapping slide titles to image paths
+        image_paths_by_id: Dictionary mapping slide ids (record indexes) to image paths
         
     Returns:
         True if successful, False otherwise
     """
+    image_paths_by_id = image_paths_by_id or {}
+    heading_levels = {"module": "##", "topic": "###", "subtopic": "####"}
+    
     try:
         # Get the base directory for relative image paths
         output_dir = os.path.dirname(output_path)
+        rel_dirs = {}  # Image directory -> path relative to output_dir
         
-        with open(output_path, 'w') as md_file:
-            # Write title
-            md_file.write(f"# Title: {course_title}\n\n")
-            md_file.write(f"*Generated on {time.strftime('%Y-%m-%d')}*\n\n")
+        # Build the whole document in memory and write it once
+        parts = [
+            f"# Title: {course_title}\n\n",
+            f"*Generated on {time.strftime('%Y-%m-%d')}*\n\n"
+        ]
+        
+        # Records are in outline order: each module, then its topics, then their subtopics
+        for slide_id, rec in enumerate(slides):
+            parts.append(f"{heading_levels[rec.kind]} {rec.title}\n\n")
             
-            # Process modules
-            for module_num, module_data in outline_data.items():
-                module_title = module_data["title"]
-                module_slide_title = f"Module {module_num}: {module_title}"
-                md_file.write(f"## {module_title}\n\n")
-                
-                # Include module slide image if available
-                if image_paths_by_title and module_slide_title in image_paths_by_title:
-                    image_path = image_paths_by_title[module_slide_title]
-                    # Convert to relative path for Markdown
-                    rel_path = os.path.relpath(image_path, output_dir)
-                    md_file.write(f"![{module_title}]({rel_path})\n\n")
-                
-                # Process topics in this module
-                for topic_num, topic_data in module_data["topics"].items():
-                    topic_title = topic_data["title"]
-                    topic_slide_title = f"{topic_num}: {topic_title}"
-                    md_file.write(f"### {topic_title}\n\n")
-                    
-                    # Include topic slide image if available
-                    if image_paths_by_title and topic_slide_title in image_paths_by_title:
-                        image_path = image_paths_by_title[topic_slide_title]
-                        # Convert to relative path for Markdown
-                        rel_path = os.path.relpath(image_path, output_dir)
-                        md_file.write(f"![{topic_title}]({rel_path})\n\n")
-                    
-                    # Process subtopics in this topic
-                    for subtopic_num, subtopic_data in topic_data["subtopics"].items():
-                        subtopic_title = subtopic_data["title"]
-                        subtopic_slide_title = f"{subtopic_title}"
-                        md_file.write(f"#### {subtopic_title}\n\n")
-                        
-                        # Include subtopic slide image if available
-                        if image_paths_by_title and subtopic_slide_title in image_paths_by_title:
-                            image_path = image_paths_by_title[subtopic_slide_title]
-                            # Convert to relative path for Markdown
-                            rel_path = os.path.relpath(image_path, output_dir)
-                            md_file.write(f"![{subtopic_title}]({rel_path})\n\n")
-                        
-                        # Process points in this subtopic
-                        for point in subtopic_data["points"]:
-                            md_file.write(f"- {point}\n")
-                        md_file.write("\n")  # Extra line after points
+            # Include the slide image if available
+            image_path = image_paths_by_id.get(slide_id)
+            if image_path:
+                # Convert to relative path for Markdown - images share one or two
+                # directories, so relpath only runs once per directory
+                image_dir, image_name = os.path.split(image_path)
+                rel_dir = rel_dirs.get(image_dir)
+                if rel_dir is None:
+                    rel_dir = rel_dirs[image_dir] = os.path.relpath(image_dir or os.curdir, output_dir)
+                rel_path = image_name if rel_dir == os.curdir else os.path.join(rel_dir, image_name)
+                parts.append(f"![{rec.title}]({rel_path})\n\n")
             
-            print(f"Markdown version with images saved to: {output_path}")
-            return True
+            # Process points in this subtopic, with an extra line after them
+            if rec.kind == "subtopic":
+                parts.extend(f"- {point}\n" for point in rec.bullets)
+                parts.append("\n")
+        
+        with open(output_path, 'w') as md_file:
+            md_file.write("".join(parts))
+        
+        print(f"Markdown version with images saved to: {output_path}")
+        return True
     except Exception as e:
         print(f"Error creating Markdown version: {e}")
         return False
         
-def add_slides_to_presentation(prs, slides_data, image_paths_by_title):
-    """
-    Add content slides to the presentation using pre-generated images.
-    
-    Args:
-        prs: PowerPoint presentation object
-        slides_data: List of dictionaries with slide information
-        image_paths_by_title: Dictionary mapping slide titles to image file paths
-        
-    Returns:
-        None
-    """
-    # Now create all slides with the pre-generated images
-    print("\nCreating slides with pre-generated images...")
-    slides_counter = 1  # Starting with the title slide
-    
-    for slide_data in slides_data:
-        # Create the slide with content
-        slide = create_content_slide(
-            prs, 
-            slide_data["title"], 
-            slide_data["content"], 
-            slide_data["color"],
-            generate_images=False,  # Don't generate images now, we already did
-            image_path=image_paths_by_title.get(slide_data["title"])
-        )
-        slides_counter += 1
-        
-    print(f"\nGenerated {slides_counter} slides.")
-    return slides_counter
-
 def main():
     """Main function to run the presentation generation process."""
+    from pptx import Presentation
+    from a07_Slide_Snapshot_Generator import generate_snapshots_for_presentation
+    
     print("=" * 70)
     print("Course PowerPoint Generator".center(70))
     print("=" * 70)
@@ -1037,35 +1174,22 @@ def main():
         output_markdown_path = os.path.join(CURRENT_DIR, OUTPUT_MARKDOWN)
         # Check if we have the outline file in the new directory
         if not os.path.exists(outline_path) and os.path.exists(OUTLINE_FILE):
-            # Copy from root to directory
-            with open(OUTLINE_FILE, 'r') as src_file:
-                content = src_file.read()
-            with open(outline_path, 'w') as dst_file:
-                dst_file.write(content)
+            # Copy from root to directory (in-kernel where the OS supports it)
+            shutil.copyfile(OUTLINE_FILE, outline_path)
             print(f"Copied outline file to {CURRENT_DIR} directory")
     
-    # Check for template file
-    template_path = None
-    
-    # Try each template option
-    for template in TEMPLATE_OPTIONS:
-        # Check in current directory first
-        if CURRENT_DIR and os.path.exists(os.path.join(CURRENT_DIR, template)):
-            if template.endswith('.pptx'):
-                template_path = os.path.join(CURRENT_DIR, template)
-                print(f"\nUsing PowerPoint template from directory: {template_path}")
-                break
-            elif template.endswith('.potx'):
-                print(f"\nFound {template} but python-pptx cannot directly use .potx files.")
-                print("Please save your template as .pptx format instead.")
-        # Then check in root directory
-        elif os.path.exists(template):
-            if template.endswith('.pptx'):
-                template_path = template
-                print(f"\nUsing PowerPoint template: {template}")
-                break
-            elif template.endswith('.potx'):
-                print(f"\nFound {template} but python-pptx cannot directly use .potx files.")
+    # Check for template file - each option in the course directory first, then the root
+    template_dirs = [CURRENT_DIR, ""] if CURRENT_DIR else [""]
+    template_candidates = [os.path.join(d, template) for template in TEMPLATE_OPTIONS for d in template_dirs]
+    template_path = next((c for c in template_candidates
+                          if c.endswith('.pptx') and os.path.isfile(c)), None)
+    
+    if template_path:
+        print(f"\nUsing PowerPoint template: {template_path}")
+    else:
+        for candidate in template_candidates:
+            if candidate.endswith('.potx') and os.path.isfile(candidate):
+                print(f"\nFound {candidate} but python-pptx cannot directly use .potx files.")
                 print("Please save your template as .pptx format instead.")
     
     if template_path is None:
@@ -1080,13 +1204,13 @@ def main():
     
     # Load enhanced notes if available
     notes_file_path = os.path.join(CURRENT_DIR, ENHANCED_NOTES_FILE) if CURRENT_DIR else ENHANCED_NOTES_FILE
-    global enhanced_notes
-    enhanced_notes = load_enhanced_notes(notes_file_path)
+    notes = load_enhanced_notes(notes_file_path)
+    notes_index = build_enhanced_notes_index(notes)
     
     # Debug: Print the keys in enhanced notes to help with matching
-    if enhanced_notes:
+    if notes:
         print("\nEnhanced notes keys available:")
-        for key in enhanced_notes.keys():
+        for key in notes.keys():
             print(f"  - '{key}'")
     else:
         print("\nNo enhanced notes loaded.")
@@ -1094,16 +1218,14 @@ def main():
     print(f"\nReading course outline from '{outline_path}'...")
     
     try:
-        # Parse the outline file
-        outline_data, course_title = parse_outline(outline_path)
+        # Parse the outline file into flat slide records, and the nested
+        # outline that the Markdown and student-notes steps expect
+        course_title, outline_slides = parse_outline_records(outline_path)
+        outline_data = outline_from_records(outline_slides)
         
-        # Count the number of slides that will be created
-        module_count = len(outline_data)
-        topic_count = sum(len(module_data["topics"]) for module_data in outline_data.values())
-        subtopic_count = sum(
-            sum(len(topic_data["subtopics"]) for topic_data in module_data["topics"].values())
-            for module_data in outline_data.values()
-        )
+        # Prepare slide data for all slides we'll generate, counting the outline in the same pass
+        slides_data, module_count, topic_count, subtopic_count = prepare_slides_data(
+            outline_slides, max_slides=MAX_SLIDES_TO_PROCESS-1)  # -1 for title slide
         
         total_slides = 1 + module_count + topic_count + subtopic_count  # Title slide + content slides
         
@@ -1111,34 +1233,39 @@ def main():
         print(f"Generating PowerPoint presentation with {total_slides} slides...")
         print(f"Using the title: '{course_title}'")
         
-        # Prepare slide data for all slides we'll generate
-        slides_data = prepare_slides_data(outline_data, max_slides=MAX_SLIDES_TO_PROCESS-1)  # -1 for title slide
         print(f"Preparing {len(slides_data)} slides for generation")
         
-        # Generate all images in parallel and collect the paths
-        print("Generating slide images...")
-        image_paths_by_title = generate_slide_images_parallel(slides_data, batch_size=25)
+        # Do all image work before building the deck - python-pptx is single-threaded,
+        # but the title image (CPU-bound PIL work) can render in a worker process
+        # while the slide images are being generated over the network
+        title_slide_output_dir = os.path.dirname(output_pptx_path)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            # Generate a dynamic title slide image based on the course title
+            print("\nGenerating title slide image based on course title...")
+            title_image_future = executor.submit(
+                generate_title_slide_image,
+                course_title, 
+                title_slide_output_dir, 
+                subtitle_text="Generated Course Presentation"
+            )
+            
+            # Generate all images in parallel and collect the paths
+            print("Generating slide images...")
+            image_paths_by_id = generate_slide_images_parallel(slides_data, batch_size=25)
+            
+            title_image_path = title_image_future.result()
         
         # Generate the PowerPoint presentation
         print("Creating PowerPoint presentation...")
         prs = Presentation(template_path) if template_path and os.path.exists(template_path) else Presentation()
         
-        # Generate a dynamic title slide image based on the course title
-        title_slide_output_dir = os.path.dirname(output_pptx_path)
-        print("\nGenerating title slide image based on course title...")
-        title_image_path = generate_title_slide_image(
-            course_title, 
-            title_slide_output_dir, 
-            subtitle_text="Generated Course Presentation"
-        )
-        
         # Add title slide with the generated image
         print("\nAdding title slide with generated image...")
-        create_title_slide(prs, course_title, image_path=title_image_path)
+        create_title_slide(prs, course_title, notes, notes_index, image_path=title_image_path)
         
         # Add content slides with images
         print("\nCreating slides with pre-generated images...")
-        add_slides_to_presentation(prs, slides_data, image_paths_by_title)
+        add_slides_to_presentation(prs, slides_data, image_paths_by_id, notes_index)
         
         # Save the PowerPoint
         prs.save(output_pptx_path)
@@ -1148,42 +1275,23 @@ def main():
         os.makedirs(snapshot_dir, exist_ok=True)
         print("\nGenerating enhanced slide snapshots for Markdown export...")
         
-        # Find the actual AI-generated images in the output directory
-        ai_images_dir = os.path.join(os.path.dirname(output_markdown_path), "slide_images")
-        print(f"Looking for AI images in: {ai_images_dir}")
-        
-        # Create a list of all available image files
-        ai_image_files = []
-        if os.path.exists(ai_images_dir):
-            ai_image_files = sorted([os.path.join(ai_images_dir, f) for f in os.listdir(ai_images_dir) 
-                                   if f.endswith('.png') or f.endswith('.jpg')])
-            print(f"Found {len(ai_image_files)} AI-generated images")
-        
-        # Create a mapping of slide indices to image paths
-        slide_to_image_map = {}
-        for i, slide in enumerate(slides_data):
-            if i < len(ai_image_files):
-                slide_to_image_map[slide["title"]] = ai_image_files[i]
-        
-        # Collect all slide data including content
-        all_slides_data = []
-        for slide in slides_data:
-            all_slides_data.append({
-                "title": slide["title"],
-                "content": slide.get("content", [])
-            })
+        # Map each slide to its image - generate_slide_images_parallel already
+        # knows which file belongs to which slide, so no directory scan is needed
+        slide_to_image_map = {slide_id: path for slide_id, path in image_paths_by_id.items()
+                              if path and os.path.exists(path)}
+        print(f"Found {len(slide_to_image_map)} AI-generated images")
         
         # Generate snapshots using our custom module with corrected image paths
         snapshot_paths = generate_snapshots_for_presentation(
-            all_slides_data,
-            slide_to_image_map,  # Use our new mapping instead of image_paths_by_title
+            slides_data,  # Only slide_id, title and content are read
+            slide_to_image_map,
             snapshot_dir,
             title_image_path=title_image_path,  # Pass the title image path
             course_title=course_title  # Pass the course title
         )
         
         # Generate and save Markdown version with enhanced snapshots
-        generate_markdown(outline_data, output_markdown_path, course_title, snapshot_paths)
+        generate_markdown(outline_slides, output_markdown_path, course_title, snapshot_paths)
         
         print("\nGeneration complete!")
         print(f"PowerPoint version: {output_pptx_path}")
@@ -1195,11 +1303,14 @@ def main():
         
         # Add student notes to the PowerPoint
         try:
-            # Use correct filename with hyphen instead of underscore
-            import importlib.util
-            notes_spec = importlib.util.spec_from_file_location("student_notes", "a06-Student_Notes_Student_Handbook.py")
-            student_notes = importlib.util.module_from_spec(notes_spec)
-            notes_spec.loader.exec_module(student_notes)
+            # Use correct filename with hyphen instead of underscore. The module is
+            # kept in sys.modules, so repeated main() calls only load it once
+            student_notes = sys.modules.get("student_notes")
+            if student_notes is None:
+                notes_spec = importlib.util.spec_from_file_location("student_notes", "a06-Student_Notes_Student_Handbook.py")
+                student_notes = importlib.util.module_from_spec(notes_spec)
+                notes_spec.loader.exec_module(student_notes)
+                sys.modules["student_notes"] = student_notes
             
             success = student_notes.process_presentation_with_notes(outline_data, output_pptx_path)
             if success:
@@ -7,44 +7,166 @@ using batch processing with an LLM (similar to how image prompts are generated).
 """
 
 import json
+import hashlib
+import logging
 import os
 import sys
 import time
+import threading
+import functools
+import importlib.util
+import concurrent.futures
 from pptx import Presentation
 
+# orjson encodes the prompts and decodes the notes faster; the stdlib json module is the fallback.
+# Both produce the same text: compact (or 2-space indented) with non-ASCII characters kept
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj, indent=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj, indent=False):
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
 # Add the directory to the path so we can import modules from the project
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import LLM utilities
-from a06_Image_Generation import call_llm
+from a06_Image_Generation import call_llm, LLM_CACHE_SETTINGS
+
+# Per-slide progress goes to this logger at DEBUG level; set LOGLEVEL=DEBUG to see it
+log = logging.getLogger(__name__)
 
 # Constants
 OUTPUT_PPTX = "course_presentation.pptx"
 OUTLINE_FILE = "course_outline.txt"
+ENHANCED_NOTES_FILE = "06_Enhanced_Notes.txt"
+
+# Notes are requested in batches of this many slides, several batches at a time
+NOTES_BATCH_SIZE = 12
+NOTES_MAX_CONCURRENT_REQUESTS = 4
+
+# Notes used for a batch whose LLM response can't be parsed, by slide type (others use "subtopic")
+FALLBACK_NOTES_TEMPLATES = {
+    "module": "Welcome to {title}. This module covers key concepts and principles related to this topic. Review the bullet points on the slide and elaborate on each topic.",
+    "topic": "This slide covers {title}. Explain each subtopic listed and how they relate to the overall topic.",
+    "subtopic": "In this slide about {title}, discuss each bullet point in detail, providing examples where appropriate."
+}
 
-# Get directory from current_directory.txt if available
+# Per-slide cache of generated notes, so reruns only send new or changed slides to the LLM.
+# It is the only cache of speaker notes: call_llm itself is not cached. Nothing is read
+# from or written to it when LLM_CACHE_SETTINGS is None (LLM_CACHE_ENABLED=false)
+NOTES_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".notes_cache")
+
+# Semantic notes cache: reuse the notes of a near-identical slide (e.g. from another course).
+# Only used when sentence-transformers is installed
+SEMANTIC_NOTES_CACHE_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+# Notes generated with different LLM settings are kept in separate files
+SEMANTIC_NOTES_CACHE_FILE = os.path.join(NOTES_CACHE_DIR, "semantic_notes_%s.npz" % hashlib.sha256(
+    json.dumps(LLM_CACHE_SETTINGS, sort_keys=True).encode("utf-8")).hexdigest()[:16])
+SEMANTIC_NOTES_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_NOTES_THRESHOLD = 0.92  # Cosine similarity needed to reuse notes
+SEMANTIC_NOTES_MAX_ENTRIES = 5000  # Least recently used notes are removed past this
+
+# System prompt shared by every notes batch request (its text is part of the notes cache key)
+NOTES_SYSTEM_PROMPT = """
+    You are an expert educator and speaker notes writer for technical presentations.
+    
+    I will provide you with a list of slide titles and content for a technical course.
+    For EACH slide, create comprehensive speaker notes that would help an instructor deliver the content effectively.
+    
+    PAY SPECIAL ATTENTION to these specific slide types:
+    1. For slides with "type": "title", create a welcoming introduction for the entire course.
+    2. For slides with "type": "module", create an engaging module introduction.
+    3. For all other slides, create standard detailed notes.
+    
+    IMPORTANT: EVERY slide must have notes, including title slides and module slides.
+    
+    The student notes should:
+    - Be a couple of paragraphs long and can be read by a student to understand the content
+    - For title slides: Include a warm welcome and brief course overview
+    - For module slides: Include an introduction to the module's importance and key learning objectives
+    
+    Provide your response as JSON Lines: one JSON object per slide, each on its own line, with the structure:
+    {"title": "slide title", "notes": "student notes"}
+    
+    For example:
+    {"title": "Course: AI in Cybersecurity", "notes": "Welcome to our comprehensive course on AI in Cybersecurity. Throughout this program, we'll explore how artificial intelligence is revolutionizing both offensive and defensive cybersecurity operations. This course will equip you with practical knowledge of AI-powered security tools and strategies for implementing them in your organization."}
+    {"title": "1: Introduction to AI in Cybersecurity", "notes": "Welcome to our module on AI in Cybersecurity. This module provides an overview of how artificial intelligence technologies are transforming the cybersecurity landscape. Emphasize to participants that AI is both creating new security challenges and offering powerful new defensive capabilities. Engage the audience by asking how many of them currently use AI tools in their security operations. Transition: Let's begin by examining how cyber threats have evolved alongside AI technologies."}
+    
+    Only include the JSON Lines with no additional explanations or text.
+    """
+
+# Get directory from current_directory.txt if available (read once per process)
+@functools.lru_cache(maxsize=1)
 def get_current_directory():
     try:
-        if os.path.exists("current_directory.txt"):
-            with open("current_directory.txt", "r") as dir_file:
-                directory = dir_file.read().strip()
-                if directory:
-                    print(f"Using directory from current_directory.txt: {directory}")
-                    # Create directory if it doesn't exist
-                    if not os.path.exists(directory):
-                        os.makedirs(directory)
-                        print(f"Created directory: {directory}")
-                    return directory
+        with open("current_directory.txt", "r") as dir_file:
+            directory = dir_file.read().strip()
+        if directory:
+            print(f"Using directory from current_directory.txt: {directory}")
+            # Create directory if it doesn't exist
+            os.makedirs(directory, exist_ok=True)
+            return directory
+    except FileNotFoundError:
+        pass
     except Exception as e:
         print(f"Error reading current_directory.txt: {str(e)}")
     return None
 
-# Current project directory
+# Current project directory and the values derived from it
 CURRENT_DIR = get_current_directory()
+COURSE_NAME = os.path.basename(CURRENT_DIR).replace('_', ' ') if CURRENT_DIR else ""
+OUTPUT_PPTX_PATH = os.path.join(CURRENT_DIR, OUTPUT_PPTX) if CURRENT_DIR else OUTPUT_PPTX
 
 # Global variable to store generated notes
 slide_notes = {}
 
+def _iter_outline_slides(outline_data):
+    """
+    Yield the module, topic and subtopic slide dicts of an outline in slide order
+    
+    Args:
+        outline_data: The parsed outline data from the course_outline.txt
+        
+    Returns:
+        Generator of dictionaries containing slide title, content and type
+    """
+    for module, module_data in outline_data.items():
+        topics = module_data["topics"]
+        # Module number without the word "Module"
+        module_number = module_data.get("number") or module.split(None, 2)[1]
+        module_title = f"{module_number}: {module_data['title']}"
+        log.debug("Added module slide: %s", module_title)
+        yield {
+            "title": module_title,
+            "content": "\n".join([topic_data["title"] for topic_data in topics.values()]),
+            "type": "module"
+        }
+        
+        for topic, topic_data in topics.items():
+            subtopics = topic_data["subtopics"]
+            # Topic number like "1.1"
+            topic_number = topic_data.get("number") or topic.split(None, 2)[1]
+            yield {
+                "title": f"{topic_number}: {topic_data['title']}",
+                "content": "\n".join([subtopic_data["title"] for subtopic_data in subtopics.values()]),
+                "type": "topic"
+            }
+            
+            for subtopic_data in subtopics.values():
+                yield {
+                    "title": subtopic_data["title"],
+                    "content": "\n".join(subtopic_data["points"]),
+                    "type": "subtopic"
+                }
+
 def generate_slides_info_from_outline(outline_data):
     """
     Extract slide information from the outline data structure
@@ -58,50 +180,287 @@ def generate_slides_info_from_outline(outline_data):
     slides_info = []
     
     # First add the title slide
-    if CURRENT_DIR:
-        course_name = os.path.basename(CURRENT_DIR).replace('_', ' ')
+    if COURSE_NAME:
         slides_info.append({
-            "title": f"Course: {course_name}",
-            "content": "Welcome to this comprehensive course on " + course_name,
+            "title": f"Course: {COURSE_NAME}",
+            "content": "Welcome to this comprehensive course on " + COURSE_NAME,
             "type": "title"
         })
-        print(f"Added title slide for course: {course_name}")
+        print(f"Added title slide for course: {COURSE_NAME}")
     
     # Process modules, topics, and subtopics to collect slide content
-    for module, module_data in outline_data.items():
-        # Extract module number without the word "Module"
-        module_number = module.split()[1]  # Gets the number after "Module"
-        module_title = f"{module_number}: {module_data['title']}"
+    slides_info.extend(_iter_outline_slides(outline_data))
+    
+    return slides_info
+
+# Shared decoder for pulling the notes object out of LLM responses
+_JSON_DECODER = json.JSONDecoder()
+
+def parse_notes_json(response):
+    """
+    Parse the JSON object in an LLM notes response
+    
+    The object is decoded from its first "{" in one pass, so any text or
+    markdown code fence around it is ignored.
+    
+    Args:
+        response: Raw LLM response
         
-        # Module slide content
-        topic_bullets = [f"{topic_data['title']}" for topic, topic_data in module_data["topics"].items()]
-        module_content = "\n".join(topic_bullets)
-        slides_info.append({"title": module_title, "content": module_content, "type": "module"})
-        print(f"Added module slide: {module_title}")
-        
-        # Process topics
-        for topic, topic_data in module_data["topics"].items():
-            # Extract topic number 
-            topic_parts = topic.split()
-            topic_number = topic_parts[1]  # Gets the number like "1.1"
-            topic_title = f"{topic_number}: {topic_data['title']}"
-            
-            # Topic slide content
-            subtopic_bullets = [f"{subtopic_data['title']}" for subtopic, subtopic_data in topic_data["subtopics"].items()]
-            topic_content = "\n".join(subtopic_bullets)
-            slides_info.append({"title": topic_title, "content": topic_content, "type": "topic"})
+    Returns:
+        Dictionary of slide titles to speaker notes
+        
+    Raises:
+        json.JSONDecodeError: If the response has no valid JSON object
+    """
+    start_idx = response.find('{')
+    if start_idx < 0:
+        raise json.JSONDecodeError("No JSON object in response", response, 0)
+    notes, _ = _JSON_DECODER.raw_decode(response, start_idx)
+    return notes
+
+def parse_notes_jsonl(response):
+    """
+    Parse an LLM notes response with one {"title": ..., "notes": ...} object per line
+    
+    Lines are decoded independently, so a truncated or partly malformed
+    response still yields the notes of every complete line. Responses that
+    ignore the line format and return a single JSON object are still accepted.
+    
+    Args:
+        response: Raw LLM response
+        
+    Returns:
+        Dictionary of slide titles to speaker notes
+        
+    Raises:
+        json.JSONDecodeError: If no notes can be read from the response
+    """
+    notes = {}
+    for line in response.splitlines():
+        line = line.strip()
+        if not line.startswith('{'):
+            continue  # Blank lines, code fences or commentary
+        try:
+            record = _json_loads(line)
+            notes[record["title"]] = record["notes"]
+        except (ValueError, KeyError, TypeError):
+            continue
+    if notes:
+        return notes
+    return parse_notes_json(response)
+
+
+def notes_cache_path(slide_info, system_prompt):
+    """
+    Get the on-disk cache file for a slide's generated notes
+    
+    The key covers the system prompt and the LLM settings as well as the slide.
+    
+    Args:
+        slide_info: Dictionary containing slide information (title, content, type)
+        system_prompt: System prompt the notes are generated with
+        
+    Returns:
+        Path of the cache file (which may not exist yet)
+    """
+    key_data = {"s": system_prompt, "t": slide_info["title"], "c": slide_info["content"], "y": slide_info.get("type"),
+                "l": LLM_CACHE_SETTINGS}
+    key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(NOTES_CACHE_DIR, f"{key}.txt")
+
+
+@functools.lru_cache(maxsize=1)
+def _load_notes_embedder():
+    """Load the sentence embedding model for the semantic notes cache once"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SEMANTIC_NOTES_MODEL)
+
+
+def _embed_slides(slides):
+    """Embed slides (type, title and content) as rows of normalized vectors"""
+    texts = [f"{slide.get('type', '')}: {slide['title']}\n{slide['content']}" for slide in slides]
+    return _load_notes_embedder().encode(texts, normalize_embeddings=True).astype("float32")
+
+
+def _load_semantic_notes():
+    """Load the (embeddings, notes, last used times) arrays of the semantic notes cache, or None if it is empty"""
+    import numpy as np
+    
+    if not os.path.exists(SEMANTIC_NOTES_CACHE_FILE):
+        return None
+    try:
+        with np.load(SEMANTIC_NOTES_CACHE_FILE) as data:
+            # Files written before entries had a last used time count as least recently used
+            used = data["used"] if "used" in data.files else np.zeros(len(data["notes"]))
+            return data["embeddings"], data["notes"], used
+    except Exception as e:
+        print(f"Error loading semantic notes cache: {str(e)}")
+        return None
+
+
+def _save_semantic_notes(embeddings, notes, used):
+    """Save the semantic notes cache, keeping the SEMANTIC_NOTES_MAX_ENTRIES most recently used entries"""
+    import numpy as np
+    
+    if len(notes) > SEMANTIC_NOTES_MAX_ENTRIES:
+        # Keep the newest entries in their original order
+        keep = np.sort(np.argsort(used, kind="stable")[-SEMANTIC_NOTES_MAX_ENTRIES:])
+        embeddings, notes, used = embeddings[keep], notes[keep], used[keep]
+    try:
+        os.makedirs(NOTES_CACHE_DIR, exist_ok=True)
+        np.savez(SEMANTIC_NOTES_CACHE_FILE, embeddings=embeddings, notes=notes, used=used)
+    except Exception as e:
+        print(f"Error saving semantic notes cache: {str(e)}")
+
+
+def find_similar_notes(slides):
+    """
+    Find notes generated for near-identical slides
+    
+    The entries that are reused are marked as used now, so pruning removes
+    the least recently used notes first.
+    
+    Args:
+        slides: List of dictionaries containing slide information (title, content, type)
+        
+    Returns:
+        List with the reused notes, or None, for each slide
+    """
+    if not SEMANTIC_NOTES_CACHE_AVAILABLE or LLM_CACHE_SETTINGS is None or not slides:
+        return [None] * len(slides)
+    import numpy as np
+    
+    cache = _load_semantic_notes()
+    if cache is None:
+        return [None] * len(slides)
+    embeddings, notes, used = cache
+    
+    # Embeddings are normalized, so the products are cosine similarities
+    scores = _embed_slides(slides) @ embeddings.T
+    best = np.argmax(scores, axis=1)
+    hits = [i for i, j in enumerate(best) if scores[i, j] >= SEMANTIC_NOTES_THRESHOLD]
+    if hits:
+        used = used.copy()
+        used[best[hits]] = time.time()
+        _save_semantic_notes(embeddings, notes, used)
+    return [str(notes[j]) if scores[i, j] >= SEMANTIC_NOTES_THRESHOLD else None
+            for i, j in enumerate(best)]
+
+
+def add_semantic_notes(slides, notes_by_title):
+    """
+    Add LLM-generated notes to the semantic notes cache and save it
+    
+    Args:
+        slides: List of dictionaries containing slide information (title, content, type)
+        notes_by_title: Dictionary of slide titles to the notes generated for them
+    """
+    if not SEMANTIC_NOTES_CACHE_AVAILABLE or LLM_CACHE_SETTINGS is None:
+        return
+    import numpy as np
+    
+    slides = [slide for slide in slides if isinstance(notes_by_title.get(slide["title"]), str)]
+    if not slides:
+        return
+    
+    vectors = _embed_slides(slides)
+    new_notes = np.array([notes_by_title[slide["title"]] for slide in slides])
+    used = np.full(len(slides), time.time())
+    cache = _load_semantic_notes()
+    if cache is not None:
+        vectors = np.vstack([cache[0], vectors])
+        new_notes = np.concatenate([cache[1], new_notes])
+        used = np.concatenate([cache[2], used])
+    _save_semantic_notes(vectors, new_notes, used)
+
+
+def request_notes_batch(slides_batch, system_prompt):
+    """
+    Generate speaker notes for one batch of slides with a single LLM call
+    
+    Args:
+        slides_batch: List of dictionaries containing slide information (title, content, type)
+        system_prompt: System prompt for the notes LLM
+        
+    Returns:
+        Tuple of (dictionary of slide titles to speaker notes, whether the notes came
+        from the LLM rather than being fallback notes)
+    """
+    # Build the user prompt with the slides in this batch
+    slides_json = _json_dumps(slides_batch)
+    user_prompt = f"Generate detailed speaker notes for each of these technical presentation slides:\n{slides_json}"
+    
+    # Call the LLM
+    try:
+        speaker_notes_json = call_llm(user_prompt, system_prompt)
+        
+        # Parse the JSON response
+        try:
+            notes = parse_notes_jsonl(speaker_notes_json)
+            print(f"Successfully received {len(notes)} speaker notes from LLM")
+            return notes, True
             
-            # Process subtopics
-            for subtopic, subtopic_data in topic_data["subtopics"].items():
-                subtopic_title = subtopic_data['title']
-                subtopic_content = "\n".join(subtopic_data["points"])
-                slides_info.append({"title": subtopic_title, "content": subtopic_content, "type": "subtopic"})
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse JSON response: {str(e)}")
+            print("Raw response:", speaker_notes_json)
+            # Use simple fallback notes if JSON parsing fails
+            default_template = FALLBACK_NOTES_TEMPLATES["subtopic"]
+            return {slide_info["title"]: FALLBACK_NOTES_TEMPLATES.get(slide_info["type"], default_template).format(title=slide_info["title"])
+                    for slide_info in slides_batch}, False
     
-    return slides_info
+    except Exception as e:
+        print(f"Error generating speaker notes: {str(e)}")
+        # Create simple fallback notes
+        return {slide_info["title"]: f"Discuss the key points on this slide about {slide_info['title']}."
+                for slide_info in slides_batch}, False
+
+
+def cache_slide_notes(slides_batch, notes, system_prompt):
+    """
+    Store LLM-generated notes for each slide of a batch in the notes cache
+    
+    Args:
+        slides_batch: List of dictionaries containing slide information (title, content, type)
+        notes: Dictionary of slide titles to speaker notes returned for the batch
+        system_prompt: System prompt the notes were generated with
+    """
+    if LLM_CACHE_SETTINGS is None:
+        return
+    try:
+        os.makedirs(NOTES_CACHE_DIR, exist_ok=True)
+        for slide_info in slides_batch:
+            slide_note = notes.get(slide_info["title"])
+            if isinstance(slide_note, str) and slide_note:
+                with open(notes_cache_path(slide_info, system_prompt), 'w', encoding='utf-8') as f:
+                    f.write(slide_note)
+    except OSError as e:
+        print(f"Warning: could not cache speaker notes: {str(e)}")
+
+
+def save_notes_file(output_path, notes):
+    """
+    Atomically write the merged speaker notes as JSON
+    
+    The notes go to a temporary file that replaces the target in one step,
+    so readers never see a partially written notes file.
+    
+    Args:
+        output_path: Path of the notes file
+        notes: Dictionary mapping slide titles to speaker notes
+    """
+    tmp_path = output_path + ".tmp"
+    try:
+        notes_json = _json_dumps(notes, indent=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(notes_json)
+        os.replace(tmp_path, output_path)
+        print(f"Enhanced notes saved to: {output_path}")
+    except (OSError, TypeError) as e:
+        print(f"Error saving enhanced notes: {str(e)}")
 
 def generate_all_speaker_notes(slides_info, max_slides=0):
     """
-    Generate speaker notes for all slides in the presentation in a single batch
+    Generate speaker notes for all slides in the presentation, in concurrent batches
     
     Args:
         slides_info: List of dictionaries containing slide information (title, content, type)
@@ -140,11 +499,9 @@ def generate_all_speaker_notes(slides_info, max_slides=0):
     print(f"Processing {len(slides_info)} slides for notes generation")
     
     # For debugging
-    for slide in slides_info:
-        print(f"Slide: {slide['title']}")
-        content_preview = slide['content'][:50] + '...' if len(slide['content']) > 50 else slide['content']
-        print(f"Content: {content_preview}")
-        print("---")
+    if log.isEnabledFor(logging.DEBUG):
+        for slide in slides_info:
+            log.debug("Slide: %s | Content: %.50s", slide['title'], slide['content'])
     
     print(f"Found {len(slides_info)} slides for speaker notes generation")
     
@@ -153,108 +510,75 @@ def generate_all_speaker_notes(slides_info, max_slides=0):
         slides_info = slides_info[:max_slides]
         print(f"Limited to {len(slides_info)} slides for testing")
     
-    # Create a single batch prompt for all slides
-    system_prompt = """
-    You are an expert educator and speaker notes writer for technical presentations.
-    
-    I will provide you with a list of slide titles and content for a technical course.
-    For EACH slide, create comprehensive speaker notes that would help an instructor deliver the content effectively.
-    
-    PAY SPECIAL ATTENTION to these specific slide types:
-    1. For slides with "type": "title", create a welcoming introduction for the entire course.
-    2. For slides with "type": "module", create an engaging module introduction.
-    3. For all other slides, create standard detailed notes.
-    
-    IMPORTANT: EVERY slide must have notes, including title slides and module slides.
-    
-    The student notes should:
-    - Be a couple of paragraphs long and can be read by a student to understand the content
-    - For title slides: Include a warm welcome and brief course overview
-    - For module slides: Include an introduction to the module's importance and key learning objectives
-    
-    Provide your response as a JSON object with the following structure:
-    {"slide_title": "student notes"}
-    
-    For example:
-    {
-      "Course: AI in Cybersecurity": "Welcome to our comprehensive course on AI in Cybersecurity. Throughout this program, we'll explore how artificial intelligence is revolutionizing both offensive and defensive cybersecurity operations. This course will equip you with practical knowledge of AI-powered security tools and strategies for implementing them in your organization.",
-      "1: Introduction to AI in Cybersecurity": "Welcome to our module on AI in Cybersecurity. This module provides an overview of how artificial intelligence technologies are transforming the cybersecurity landscape. Emphasize to participants that AI is both creating new security challenges and offering powerful new defensive capabilities. Engage the audience by asking how many of them currently use AI tools in their security operations. Transition: Let's begin by examining how cyber threats have evolved alongside AI technologies."
-    }
-    
-    Only include the JSON response with no additional explanations or text.
-    """
-    
-    # Build the user prompt with all slides
-    slides_json = json.dumps(slides_info, indent=2)
-    user_prompt = f"Generate detailed speaker notes for each of these technical presentation slides:\n{slides_json}"
-    
-    # Call the LLM
-    try:
-        print(f"Sending batch request to LLM for {len(slides_info)} slide notes...")
-        speaker_notes_json = call_llm(user_prompt, system_prompt)
-        
-        # Save the raw notes response to a file
-        output_filename = "06_Enhanced_Notes.txt"
-        
-        # Check if we should save to a subdirectory
-        if CURRENT_DIR:
-            # Ensure directory exists
-            if not os.path.exists(CURRENT_DIR):
-                os.makedirs(CURRENT_DIR)
-            output_path = os.path.join(CURRENT_DIR, output_filename)
-        else:
-            output_path = output_filename
-        
-        # Save the raw response
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(speaker_notes_json)
-        print(f"Enhanced notes saved to: {output_path}")
-        
-        # Parse the JSON response
+    system_prompt = NOTES_SYSTEM_PROMPT
+    
+    # Identical slides (e.g. a repeated "Summary" slide) only need their notes generated
+    # once - notes are keyed by title, so every occurrence picks up the same notes
+    unique_slides = list({(slide_info["title"], slide_info["content"], slide_info["type"]): slide_info
+                          for slide_info in slides_info}.values())
+    if len(unique_slides) < len(slides_info):
+        print(f"Skipping {len(slides_info) - len(unique_slides)} duplicate slides")
+    
+    # Reuse notes generated on earlier runs for unchanged slides, unless caching is off
+    cached_notes = {}
+    uncached_slides = []
+    for slide_info in unique_slides:
+        if LLM_CACHE_SETTINGS is None:
+            uncached_slides.append(slide_info)
+            continue
         try:
-            # Extract JSON from response, handling markdown code blocks if present
-            if "```json" in speaker_notes_json:
-                # Extract content between ```json and ```
-                json_start = speaker_notes_json.find("```json") + 7
-                json_end = speaker_notes_json.find("```", json_start)
-                if json_end > json_start:
-                    speaker_notes_json = speaker_notes_json[json_start:json_end].strip()
+            with open(notes_cache_path(slide_info, system_prompt), 'r', encoding='utf-8') as f:
+                cached_notes[slide_info["title"]] = f.read()
+        except OSError:
+            uncached_slides.append(slide_info)
+    
+    # Then reuse the notes of near-identical slides, e.g. shared introductions
+    if uncached_slides and SEMANTIC_NOTES_CACHE_AVAILABLE and LLM_CACHE_SETTINGS is not None:
+        similar_slides = 0
+        remaining_slides = []
+        for slide_info, similar_notes in zip(uncached_slides, find_similar_notes(uncached_slides)):
+            if similar_notes is None:
+                remaining_slides.append(slide_info)
+            else:
+                cached_notes[slide_info["title"]] = similar_notes
+                similar_slides += 1
+        uncached_slides = remaining_slides
+        if similar_slides:
+            print(f"Reusing notes of similar slides for {similar_slides} slides")
+    if cached_notes:
+        print(f"Found {len(cached_notes)} slide notes in the notes cache")
+    
+    # Request the notes in batches, several at a time - smaller responses come
+    # back sooner and are less likely to be truncated than one huge JSON object
+    slide_notes = {}
+    if uncached_slides:
+        batches = [uncached_slides[i:i + NOTES_BATCH_SIZE] for i in range(0, len(uncached_slides), NOTES_BATCH_SIZE)]
+        print(f"Sending {len(batches)} batch requests to LLM for {len(uncached_slides)} slide notes...")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(NOTES_MAX_CONCURRENT_REQUESTS, len(batches))) as executor:
+            batch_futures = [executor.submit(request_notes_batch, batch, system_prompt) for batch in batches]
             
-            # Try to clean up any extra whitespace or non-JSON content
-            speaker_notes_json = speaker_notes_json.strip()
-            if not speaker_notes_json.startswith("{"):
-                # Find first occurrence of '{'
-                start_idx = speaker_notes_json.find('{')
-                if start_idx >= 0:
-                    speaker_notes_json = speaker_notes_json[start_idx:]
-            
-            # Load the JSON
-            slide_notes = json.loads(speaker_notes_json)
-            print(f"Successfully received {len(slide_notes)} speaker notes from LLM")
-            
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON response: {str(e)}")
-            print("Raw response:", speaker_notes_json)
-            # Use fallback notes if JSON parsing fails
-            slide_notes = {}
-            for slide_info in slides_info:
-                slide_title = slide_info["title"]
-                slide_type = slide_info["type"]
-                # Create simple fallback notes
-                if slide_type == "module":
-                    slide_notes[slide_title] = f"Welcome to {slide_title}. This module covers key concepts and principles related to this topic. Review the bullet points on the slide and elaborate on each topic."
-                elif slide_type == "topic":
-                    slide_notes[slide_title] = f"This slide covers {slide_title}. Explain each subtopic listed and how they relate to the overall topic."
-                else:  # subtopic
-                    slide_notes[slide_title] = f"In this slide about {slide_title}, discuss each bullet point in detail, providing examples where appropriate."
-    
-    except Exception as e:
-        print(f"Error generating speaker notes: {str(e)}")
-        # Create simple fallback notes
-        slide_notes = {}
-        for slide_info in slides_info:
-            slide_title = slide_info["title"]
-            slide_notes[slide_title] = f"Discuss the key points on this slide about {slide_title}."
+            # Merge in slide order, so a title repeated across batches resolves the same way every run
+            generated_slides = []
+            for batch, future in zip(batches, batch_futures):
+                notes, generated = future.result()
+                slide_notes.update(notes)
+                if generated:
+                    cache_slide_notes(batch, notes, system_prompt)
+                    generated_slides.extend(batch)
+        add_semantic_notes(generated_slides, slide_notes)
+    slide_notes.update(cached_notes)
+    print(f"Received speaker notes for {len(slide_notes)} slides")
+    
+    # Save the merged notes as JSON (the PowerPoint builder loads this file)
+    if CURRENT_DIR:
+        # Ensure directory exists
+        os.makedirs(CURRENT_DIR, exist_ok=True)
+        output_path = os.path.join(CURRENT_DIR, ENHANCED_NOTES_FILE)
+    else:
+        output_path = ENHANCED_NOTES_FILE
+    # Write in the background so adding the notes to the deck isn't held up by disk I/O.
+    # The thread is not a daemon, so the interpreter still waits for the write on exit
+    threading.Thread(target=save_notes_file, args=(output_path, dict(slide_notes))).start()
     
     return slide_notes
 
@@ -277,20 +601,36 @@ def get_speaker_notes(slide_title):
         return f"Speaker notes for '{slide_title}' not available. Please explain the slide content based on the bullet points shown."
 
 
-def add_speaker_notes_to_presentation(pptx_file, slide_notes_dict):
+def set_slide_notes(slide, notes_text):
+    """
+    Replace a slide's speaker notes with the given text
+    
+    Setting the text frame's text drops all existing paragraphs of the notes
+    body in one XML operation, instead of blanking every run one by one.
+    
+    Args:
+        slide: A python-pptx slide
+        notes_text: The speaker notes for the slide
+    """
+    slide.notes_slide.notes_text_frame.text = notes_text
+
+def add_speaker_notes_to_presentation(pptx_file, slide_notes_dict, presentation=None):
     """
     Add generated speaker notes to each slide in a PowerPoint presentation
     
     Args:
         pptx_file: Path to the PowerPoint file
         slide_notes_dict: Dictionary of slide titles to speaker notes
+        presentation: Optional already loaded Presentation of pptx_file, so
+            the deck isn't parsed a second time
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Load the presentation
-        presentation = Presentation(pptx_file)
+        # Load the presentation unless the caller already has it open
+        if presentation is None:
+            presentation = Presentation(pptx_file)
         
         # Track how many notes we added
         notes_added = 0
@@ -312,16 +652,14 @@ def add_speaker_notes_to_presentation(pptx_file, slide_notes_dict):
             notes_text = None
             
             # First try: Look for exact title match from any text in the slide
-            for shape in slide.shapes:
-                if hasattr(shape, "has_text_frame") and shape.has_text_frame:
-                    try:
-                        slide_title = shape.text_frame.text
-                        if slide_title and slide_title in slide_notes_dict:
-                            notes_text = slide_notes_dict[slide_title]
-                            print(f"Found notes using exact title match: {slide_title}")
-                            break
-                    except:
-                        pass
+            # (every shape has has_text_frame, so no hasattr probe is needed)
+            text_shapes = [shape for shape in slide.shapes if shape.has_text_frame]
+            for shape in text_shapes:
+                slide_title = shape.text_frame.text
+                if slide_title in slide_notes_dict:
+                    notes_text = slide_notes_dict[slide_title]
+                    print(f"Found notes using exact title match: {slide_title}")
+                    break
             
             # Second try: Use fallback title from directory name
             if not notes_text and fallback_title and fallback_title in slide_notes_dict:
@@ -336,54 +674,31 @@ def add_speaker_notes_to_presentation(pptx_file, slide_notes_dict):
             
             # If we found notes, add them to the slide
             if notes_text:
-                notes_slide = slide.notes_slide
-                notes_text_frame = notes_slide.notes_text_frame
-                
-                # Clear existing notes if any
-                if notes_text_frame.text:
-                    for paragraph in notes_text_frame.paragraphs:
-                        for run in paragraph.runs:
-                            run.text = ""
-                
-                # Add the new notes
-                p = notes_text_frame.paragraphs[0] if notes_text_frame.paragraphs else notes_text_frame.add_paragraph()
-                p.text = notes_text
+                set_slide_notes(slide, notes_text)
                 notes_added += 1
         
         # Regular handling for multi-slide presentations
         else:
+            # Match titles case- and whitespace-insensitively with one lookup per slide
+            notes_by_title = {}
+            for title, notes_text in slide_notes_dict.items():
+                notes_by_title.setdefault(title.strip().lower(), notes_text)
+            
             # Process each slide
             for slide in presentation.slides:
-                # Find the title shape in the slide
-                title_shape = None
-                for shape in slide.shapes:
-                    if hasattr(shape, "has_text_frame") and shape.has_text_frame:
-                        # Check if this shape is the title (usually the first text shape)
-                        if hasattr(shape, "name") and ("Title" in shape.name or notes_added == 0):
-                            title_shape = shape
-                            break
+                # Use the title placeholder, or a shape named like a title on layouts without one
+                title_shape = slide.shapes.title
+                if title_shape is None:
+                    title_shape = next((shape for shape in slide.shapes
+                                        if shape.has_text_frame and "Title" in shape.name), None)
                 
-                # If we found a title, try to add notes
-                if title_shape and title_shape.has_text_frame:
-                    slide_title = title_shape.text_frame.text
-                    
-                    # Look for notes for this title
-                    if slide_title in slide_notes_dict:
-                        # Get the notes slide
-                        notes_slide = slide.notes_slide
-                        
-                        # Clear any existing notes text (if needed)
-                        notes_text_frame = notes_slide.notes_text_frame
-                        if notes_text_frame.text:
-                            for paragraph in notes_text_frame.paragraphs:
-                                for run in paragraph.runs:
-                                    run.text = ""
-                        
-                        # Add the new notes
-                        notes_text = slide_notes_dict[slide_title]
-                        p = notes_text_frame.paragraphs[0] if notes_text_frame.paragraphs else notes_text_frame.add_paragraph()
-                        p.text = notes_text
-                        notes_added += 1
+                # If we found a title, look for notes for it
+                if title_shape is None or not title_shape.has_text_frame:
+                    continue
+                notes_text = notes_by_title.get(title_shape.text_frame.text.strip().lower())
+                if notes_text:
+                    set_slide_notes(slide, notes_text)
+                    notes_added += 1
         
         # Save the presentation
         presentation.save(pptx_file)
@@ -396,6 +711,45 @@ def add_speaker_notes_to_presentation(pptx_file, slide_notes_dict):
         return False
 
 
+# Slide XML tags used to read slide text without python-pptx's shape proxies
+_PML_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_DML_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+TITLE_PLACEHOLDER_TYPES = ("title", "ctrTitle")
+
+def extract_slide_texts(slide):
+    """
+    Read the text of each top-level text shape on a slide directly from its XML
+    
+    This walks the slide's lxml tree once instead of going through
+    python-pptx's shape and paragraph proxies, which are slow on large decks.
+    
+    Args:
+        slide: A python-pptx slide
+        
+    Returns:
+        List of (is_title, text) tuples in shape order, where text is the
+        shape's paragraphs joined by newlines and empty shapes are skipped
+    """
+    texts = []
+    for sp in slide.shapes._spTree.iterchildren(_PML_NS + "sp"):
+        paragraphs = [
+            "".join(t.text or "" for t in para.iter(_DML_NS + "t"))
+            for para in sp.iter(_DML_NS + "p")
+        ]
+        text = "\n".join(paragraphs).strip()
+        if not text:
+            continue
+        
+        # A title placeholder marks the title; the shape name covers plain text boxes
+        placeholder = sp.find(f"{_PML_NS}nvSpPr/{_PML_NS}nvPr/{_PML_NS}ph")
+        name = sp.find(f"{_PML_NS}nvSpPr/{_PML_NS}cNvPr")
+        is_title = (
+            (placeholder is not None and placeholder.get("type") in TITLE_PLACEHOLDER_TYPES)
+            or (name is not None and "Title" in name.get("name", ""))
+        )
+        texts.append((is_title, text))
+    return texts
+
 def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slides=0):
     """
     Main function to generate speaker notes and add them to a PowerPoint presentation
@@ -410,23 +764,25 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
     """
     # Use the specified file or determine from current directory
     if pptx_file is None:
-        if CURRENT_DIR:
-            pptx_file = os.path.join(CURRENT_DIR, OUTPUT_PPTX)
-        else:
-            pptx_file = OUTPUT_PPTX
+        pptx_file = OUTPUT_PPTX_PATH
     
     # Check if the presentation exists
     if not os.path.exists(pptx_file):
         print(f"Error: PowerPoint file '{pptx_file}' not found.")
         print("Please run a05_CREATE_POWERPOINT.py first to generate the presentation.")
         return False
+    
+    # Open the presentation once for both the slide extraction and the notes
+    try:
+        presentation = Presentation(pptx_file)
+    except Exception as e:
+        print(f"Error opening PowerPoint file '{pptx_file}': {str(e)}")
+        return False
         
     # If outline_data is None, extract slides directly from the PowerPoint
     if outline_data is None or not outline_data:
         print("No outline data provided. Extracting slide content directly from PowerPoint...")
         try:
-            # Open the presentation
-            presentation = Presentation(pptx_file)
             print(f"PowerPoint file opened: {pptx_file}")
             print(f"Total slides in presentation: {len(presentation.slides)}")
             
@@ -434,10 +790,7 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
             slides_info = []
             
             # Get course title from directory name if available
-            course_title = ""
-            if CURRENT_DIR:
-                base_dir = os.path.basename(CURRENT_DIR)
-                course_title = base_dir.replace('_', ' ')
+            course_title = COURSE_NAME
             
             # Special handling for the first slide - always treat as a title slide
             print("Processing title slide")
@@ -450,12 +803,10 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
                     ppt_title = presentation.core_properties.title
                     
                     # If not found, try to extract from slide content
-                    if not ppt_title and hasattr(slide, "shapes"):
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text_frame") and shape.text_frame and hasattr(shape.text_frame, "text"):
-                                if shape.text_frame.text:
-                                    ppt_title = shape.text_frame.text
-                                    break
+                    if not ppt_title:
+                        first_texts = extract_slide_texts(slide)
+                        if first_texts:
+                            ppt_title = first_texts[0][1]
                     
                     # If still not found, use course title from directory
                     if not ppt_title and course_title:
@@ -492,60 +843,23 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
             
             # Regular slide processing
             for i, slide in enumerate(presentation.slides):
-                print(f"Processing slide {i+1}/{len(presentation.slides)}")
+                log.debug("Processing slide %d/%d", i + 1, len(presentation.slides))
                 
                 slide_title = ""
                 slide_content = []
                 
-                # List all shapes in the slide
-                print(f"  Shapes in slide {i+1}: {len(slide.shapes)}")
-                for j, shape in enumerate(slide.shapes):
-                    shape_name = getattr(shape, 'name', 'Unknown')
-                    print(f"  Shape {j+1}: Type={type(shape).__name__}, Name={shape_name}")
-                    
-                    # Try to get text content if available
-                    if hasattr(shape, "text_frame"):
-                        try:
-                            # Access text frames and paragraphs directly
-                            if shape.text_frame and hasattr(shape.text_frame, "paragraphs"):
-                                frame_text = ""
-                                for para in shape.text_frame.paragraphs:
-                                    if para.text:
-                                        frame_text += para.text + "\n"
-                                
-                                # Remove trailing newline
-                                frame_text = frame_text.strip()
-                                
-                                if frame_text:
-                                    print(f"    Text: {frame_text[:50]}{'...' if len(frame_text) > 50 else ''}")
-                                    # If this is the title shape or first slide and has "Title" in name
-                                    if hasattr(shape, "name") and ("Title" in shape.name or i == 0):
-                                        slide_title = frame_text
-                                        print(f"    Identified as slide title")
-                                    # Otherwise treat as content
-                                    else:
-                                        slide_content.append(frame_text)
-                                        print(f"    Added as slide content")
-                            # Fallback to direct text property
-                            elif hasattr(shape.text_frame, "text") and shape.text_frame.text:
-                                text = shape.text_frame.text
-                                print(f"    Text: {text[:50]}{'...' if len(text) > 50 else ''}")
-                                if hasattr(shape, "name") and ("Title" in shape.name or i == 0):
-                                    slide_title = text
-                                    print(f"    Identified as slide title")
-                                else:
-                                    slide_content.append(text)
-                                    print(f"    Added as slide content")
-                        except Exception as e:
-                            print(f"    Error extracting text: {str(e)}")
-                            import traceback
-                            traceback.print_exc()
+                for is_title, text in extract_slide_texts(slide):
+                    # The title placeholder (or any text on the first slide) is the slide title
+                    if is_title or i == 0:
+                        slide_title = text
+                    else:
+                        slide_content.append(text)
                 
                 # Try to find a title if we don't have one yet - use first text shape if needed
                 if not slide_title and slide_content:
                     slide_title = slide_content[0]
                     slide_content = slide_content[1:] if len(slide_content) > 1 else []
-                    print(f"  Using first text element as title: {slide_title[:50]}{'...' if len(slide_title) > 50 else ''}")
+                    log.debug("Using first text element as title: %.50s", slide_title)
                 
                 # Determine slide type
                 slide_type = "slide"  # Default type
@@ -553,16 +867,16 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
                 # Title slide detection
                 if i == 0:
                     slide_type = "title"
-                    print(f"  Detected as title slide: {slide_title}")
+                    log.debug("Detected as title slide: %s", slide_title)
                 
                 # Module slide detection
                 elif "Module" in slide_title or ("Module" in slide_title.lower() and ":" in slide_title):
                     slide_type = "module"
-                    print(f"  Detected as module slide: {slide_title}")
+                    log.debug("Detected as module slide: %s", slide_title)
                 
                 # Only add slides that have a title
                 if slide_title:
-                    print(f"  Adding slide with title: {slide_title} (Type: {slide_type})")
+                    log.debug("Adding slide with title: %s (Type: %s)", slide_title, slide_type)
                     slides_info.append({
                         "title": slide_title,
                         "content": "\n".join(slide_content),
@@ -571,7 +885,7 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
                 else:
                     # Even for slides without title, create a generic one based on slide number
                     generic_title = f"Slide {i+1}"
-                    print(f"  Creating generic title for slide {i+1}: {generic_title}")
+                    log.debug("Creating generic title for slide %d: %s", i + 1, generic_title)
                     slides_info.append({
                         "title": generic_title,
                         "content": "\n".join(slide_content) if slide_content else f"Content for slide {i+1}",
@@ -595,20 +909,17 @@ def process_presentation_with_notes(outline_data=None, pptx_file=None, max_slide
         return False
     
     # Add notes to the presentation
-    return add_speaker_notes_to_presentation(pptx_file, all_notes)
+    return add_speaker_notes_to_presentation(pptx_file, all_notes, presentation)
 
 
 if __name__ == "__main__":
     from a05_CREATE_POWERPOINT import parse_outline
     
-    # Determine paths based on current directory
-    outline_path = OUTLINE_FILE
-    output_path = OUTPUT_PPTX
+    logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO").upper(), format="%(message)s")
     
-    if CURRENT_DIR:
-        # Use directory-specific paths
-        outline_path = os.path.join(CURRENT_DIR, OUTLINE_FILE)
-        output_path = os.path.join(CURRENT_DIR, OUTPUT_PPTX)
+    # Determine paths based on current directory
+    outline_path = os.path.join(CURRENT_DIR, OUTLINE_FILE) if CURRENT_DIR else OUTLINE_FILE
+    output_path = OUTPUT_PPTX_PATH
     
     # Check if the outline file exists
     if not os.path.exists(outline_path):
@@ -629,14 +940,7 @@ if __name__ == "__main__":
         print(f"\nProcessing presentation '{output_path}' for student notes...")
         
         # Get the course title
-        course_title = ""
-        if CURRENT_DIR:
-            course_title = os.path.basename(CURRENT_DIR).replace('_', ' ')
-        elif course_title:
-            # Already have course title from parse_outline
-            pass
-        else:
-            course_title = "This Course"
+        course_title = COURSE_NAME or "This Course"
         
         print(f"Course title: {course_title}")
         
@@ -14,8 +14,13 @@ Functionality:
 import os
 import sys
 import json
+import hashlib
+import functools
 import importlib.util
 import re
+import shutil
+import threading
+import concurrent.futures
 from typing import Dict, List, Optional, Tuple
 
 # Constants
@@ -31,23 +36,81 @@ config = {
     "color_scheme": "modern corporate looke"
 }
 
+# System prompt for batch image prompt generation. Built once so every call
+# sends a byte-identical prefix (system prompt first, per-run slides last),
+# which lets providers with prompt caching reuse the processed prefix
+IMAGE_PROMPT_SYSTEM_PROMPT = f"""
+You are an expert AI image prompt engineer for presentations.
+
+I will provide you with a list of slide titles and content.
+For EACH slide, create an AI image generation concise prompt that would produce a visually appealing 
+image representing that slide's idea or concept.
+
+The image prompts should:
+- Be visually appealing and suitable for a {config['prompt_style']}
+- NOT generate any text
+- Focus on {config['focus']}
+- Use {config['color_scheme']}
+
+Provide your response as a JSON object with the following structure:
+{{"slide_title": "prompt"}}
+
+Only include the JSON response with no additional explanations or text.
+"""
+
+# Prompts are requested in chunks of this many slides, several chunks at a time, so
+# request time doesn't keep growing with the size of the course
+PROMPT_CHUNK_SIZE = 16
+PROMPT_MAX_CONCURRENT_REQUESTS = 4
+
+# Per-slide cache of enhanced prompts, so reruns only send changed slides to the LLM.
+# It is the only cache of image prompts: call_llm itself is not cached
+PROMPT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".prompt_cache")
+PROMPT_CACHE_MAX_ENTRIES = 5000  # Least recently used prompts are removed past this
+
+# Exact-match image store shared by all courses: prompt + size -> PNG
+IMAGE_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_cache")
+IMAGE_STORE_MAX_ENTRIES = 500  # Least recently used images are removed past this
+
+# Index of the stored images' prompt embeddings, so a near-identical prompt reuses an
+# image too. Only used when sentence-transformers is installed; it lives in the store
+# directory, so deleting .image_cache clears every cached image at once
+SEMANTIC_IMAGE_STORE_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+IMAGE_STORE_INDEX_FILE = os.path.join(IMAGE_STORE_DIR, "semantic_index.npz")
+IMAGE_STORE_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+IMAGE_STORE_SIMILARITY_THRESHOLD = 0.95  # Cosine similarity needed to reuse an image
+
+# Loaded on first use: (embedding matrix, list of stored file names)
+_image_store_index = None
+
+# Background writer for the raw prompt responses (the interpreter waits for it on exit)
+_io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+# Runs of characters that aren't safe in a filename (see sanitize_filename)
+UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w\-_.]+')
+
 # For backward compatibility with existing code
 IMAGE_DIR = DEFAULT_IMAGE_DIR  # This will be updated in setup_environment()
 
 
 def setup_environment() -> None:
     """Initialize environment, directories, and dependencies"""
-    # Import LLM module dynamically
-    global call_llm, IMAGE_DIR
-    llm_spec = importlib.util.spec_from_file_location("llm_module", "a02_LLM_Access.py")
-    llm_module = importlib.util.module_from_spec(llm_spec)
-    sys.modules["llm_module"] = llm_module
-    llm_spec.loader.exec_module(llm_module)
+    # Import the LLM module, reusing it if another pipeline module already loaded it
+    global call_llm, LLM_CACHE_SETTINGS, IMAGE_DIR
+    llm_module = sys.modules.get("llm_module")
+    if llm_module is None:
+        import a02_LLM_Access as llm_module
+        sys.modules["llm_module"] = llm_module
     call_llm = llm_module.call_llm
+    # Settings the cached LLM output must match (None disables the prompt and notes caches)
+    LLM_CACHE_SETTINGS = llm_module.llm_cache_settings()
     
     # Setup output directory
     output_dir = get_current_directory() or DEFAULT_IMAGE_DIR
-    config["image_dir"] = os.path.join(output_dir, "slide_images")
+    image_dir = os.path.join(output_dir, "slide_images")
+    if IMAGE_DIR == image_dir and os.path.isdir(image_dir):
+        return  # Already set up
+    config["image_dir"] = image_dir
     
     # Update global IMAGE_DIR for backward compatibility
     IMAGE_DIR = config["image_dir"]
@@ -74,8 +137,15 @@ def get_current_directory() -> Optional[str]:
         print(f"Error reading current_directory.txt: {str(e)}")
     return None
 
-# Store all generated prompts
+# Store all generated prompts (by slide title). Prompt batches may be generated on a
+# background thread while earlier batches are being used, so each batch is merged in
+# under prompt_cache_lock rather than replacing the dictionary
 prompt_cache = {}
+prompt_cache_lock = threading.Lock()
+
+# The same prompts keyed by the hash of the slide's title and content, so slides
+# that share a title but differ in content don't pick up each other's prompt
+prompts_by_slide_key = {}
 
 
 def extract_slide_info(outline_data: dict, max_slides: int = 0) -> List[dict]:
@@ -127,28 +197,27 @@ def extract_slide_info(outline_data: dict, max_slides: int = 0) -> List[dict]:
                 
             # Extract module number without the word "Module"
             try:
-                module_number = module.split()[1]  # Gets the number after "Module"
+                module_number = module_data.get("number") or module.split(maxsplit=2)[1]  # Gets the number after "Module"
                 module_title = f"{module_number}: {module_data['title']}"
+                topics = module_data["topics"]
                 
                 # Module slide content
-                topic_bullets = [f"{topic_data['title']}" for topic, topic_data in module_data["topics"].items()]
-                module_content = "\n".join(topic_bullets)
+                module_content = "\n".join([topic_data["title"] for topic_data in topics.values()])
                 slides_info.append({"title": module_title, "content": module_content})
                 
                 # Process topics
-                for topic, topic_data in module_data["topics"].items():
+                for topic, topic_data in topics.items():
                     # Extract topic number 
-                    topic_parts = topic.split()
-                    topic_number = topic_parts[1]  # Gets the number like "1.1"
+                    topic_number = topic_data.get("number") or topic.split(maxsplit=2)[1]  # Gets the number like "1.1"
                     topic_title = f"{topic_number}: {topic_data['title']}"
+                    subtopics = topic_data["subtopics"]
                     
                     # Topic slide content
-                    subtopic_bullets = [f"{subtopic_data['title']}" for subtopic, subtopic_data in topic_data["subtopics"].items()]
-                    topic_content = "\n".join(subtopic_bullets)
+                    topic_content = "\n".join([subtopic_data["title"] for subtopic_data in subtopics.values()])
                     slides_info.append({"title": topic_title, "content": topic_content})
                     
                     # Process subtopics
-                    for subtopic, subtopic_data in topic_data["subtopics"].items():
+                    for subtopic_data in subtopics.values():
                         subtopic_title = subtopic_data['title']
                         subtopic_content = "\n".join(subtopic_data["points"])
                         slides_info.append({"title": subtopic_title, "content": subtopic_content})
@@ -163,6 +232,37 @@ def extract_slide_info(outline_data: dict, max_slides: int = 0) -> List[dict]:
     return slides_info
 
 
+def prompt_cache_path(slide_info: dict) -> str:
+    """Get the on-disk cache file for a slide's enhanced prompt
+    
+    The key covers the system prompt and the LLM settings as well as the slide,
+    so changing the prompt style or the model invalidates every cached prompt.
+    
+    Args:
+        slide_info: Dictionary with slide title and content
+        
+    Returns:
+        Path of the cache file (which may not exist yet)
+    """
+    return os.path.join(PROMPT_CACHE_DIR, f"{prompt_cache_key(slide_info['title'], slide_info['content'])}.txt")
+
+
+def prompt_cache_key(slide_title: str, slide_content) -> str:
+    """Hash a slide's title and content together with the system prompt and LLM settings
+    
+    Args:
+        slide_title: Title of the slide
+        slide_content: Content of the slide (a string, or a list of bullet points)
+        
+    Returns:
+        Hex digest identifying the slide's enhanced prompt
+    """
+    if isinstance(slide_content, list):
+        slide_content = "\n".join(slide_content)
+    key_data = {"s": IMAGE_PROMPT_SYSTEM_PROMPT, "t": slide_title, "c": slide_content, "l": LLM_CACHE_SETTINGS}
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 def clean_json_response(response: str) -> str:
     """Clean and extract JSON from LLM response
     
@@ -192,12 +292,14 @@ def clean_json_response(response: str) -> str:
 def save_prompts_to_file(prompts_json: str, output_filename: str = "06_Enhanced_Prompts.txt") -> str:
     """Save raw prompt response to file
     
+    The file is written atomically on a background thread.
+    
     Args:
         prompts_json: Raw JSON response to save
         output_filename: Filename to save to
         
     Returns:
-        Path to saved file
+        Path the file is saved to
     """
     # Determine output directory
     current_dir = get_current_directory()
@@ -206,13 +308,120 @@ def save_prompts_to_file(prompts_json: str, output_filename: str = "06_Enhanced_
     else:
         output_path = output_filename
     
-    # Save the raw response
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(prompts_json)
+    # Save the raw response in the background; the prompts are parsed meanwhile
+    _io_pool.submit(_atomic_write, output_path, prompts_json)
         
     return output_path
 
 
+def _atomic_write(output_path: str, text: str) -> None:
+    """Write text to a temporary file and move it into place, so readers never see a partial file"""
+    try:
+        with open(output_path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(output_path + ".tmp", output_path)
+    except (OSError, TypeError) as e:
+        print(f"Warning: could not save {output_path}: {e}")
+
+
+# A complete "title": "prompt" pair, for recovering prompts from malformed responses
+PROMPT_PAIR_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def parse_prompts_response(response: str) -> Dict[str, str]:
+    """Parse the slide title to prompt object in an LLM response
+    
+    If the response isn't valid JSON (a stray character, or truncated
+    output), every complete "title": "prompt" pair in it is still recovered.
+    
+    Args:
+        response: Raw response from LLM
+        
+    Returns:
+        Dictionary of slide titles to enhanced prompts (possibly partial or empty)
+    """
+    cleaned_json = clean_json_response(response)
+    try:
+        prompts = json.loads(cleaned_json)
+        if isinstance(prompts, dict):
+            return prompts
+    except json.JSONDecodeError as e:
+        print(f"Failed to parse JSON response: {str(e)}. Recovering the complete prompts...")
+    
+    prompts = {}
+    for match in PROMPT_PAIR_RE.finditer(cleaned_json):
+        try:
+            prompts[json.loads(f'"{match.group(1)}"')] = json.loads(f'"{match.group(2)}"')
+        except json.JSONDecodeError:
+            continue
+    return prompts
+
+
+def request_image_prompts(slides_info: List[dict], system_prompt: str,
+                          prompts_filename: str = "06_Enhanced_Prompts.txt") -> Dict[str, str]:
+    """Ask the LLM for the image prompts of a list of slides in one call
+    
+    Args:
+        slides_info: List of dictionaries with slide title and content string
+        system_prompt: System prompt for image prompt generation
+        prompts_filename: File the raw LLM response is saved to
+        
+    Returns:
+        Dictionary of slide titles to enhanced prompts (empty if the call failed)
+    """
+    # Build the user prompt with all slides - fixed instructions first,
+    # the variable slide list last, so only the tail differs between runs
+    slides_json = json.dumps(slides_info, separators=(",", ":"), ensure_ascii=False)
+    user_prompt = f"Generate unique image prompts for each of these presentation slides:\n{slides_json}"
+    
+    # Call LLM through the module
+    try:
+        print(f"Sending batch request to generate {len(slides_info)} slide prompts...")
+        enhanced_prompts_json = call_llm(user_prompt, system_prompt)
+        
+        # Save the raw enhanced prompts to a file
+        output_path = save_prompts_to_file(enhanced_prompts_json, prompts_filename)
+        print(f"Enhanced prompts saved to: {output_path}")
+        
+        prompts = parse_prompts_response(enhanced_prompts_json)
+        print(f"Successfully received {len(prompts)} enhanced prompts")
+        return prompts
+    
+    except Exception as e:
+        print(f"Error generating enhanced prompts: {str(e)}")
+        return {}
+
+
+def request_image_prompts_in_chunks(slides_info: List[dict], system_prompt: str,
+                                    prompts_filename: str = "06_Enhanced_Prompts.txt") -> Dict[str, str]:
+    """Ask the LLM for the image prompts of a list of slides in concurrent chunks
+    
+    Args:
+        slides_info: List of dictionaries with slide title and content string
+        system_prompt: System prompt for image prompt generation
+        prompts_filename: File the raw LLM response is saved to; later chunks
+            save to the same name with a _partNN suffix
+        
+    Returns:
+        Dictionary of slide titles to enhanced prompts, merged in slide order
+    """
+    chunks = [slides_info[i:i + PROMPT_CHUNK_SIZE] for i in range(0, len(slides_info), PROMPT_CHUNK_SIZE)]
+    if len(chunks) == 1:
+        return request_image_prompts(slides_info, system_prompt, prompts_filename)
+    
+    stem, ext = os.path.splitext(prompts_filename)
+    prompts = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(PROMPT_MAX_CONCURRENT_REQUESTS, len(chunks))) as executor:
+        chunk_futures = [
+            executor.submit(request_image_prompts, chunk, system_prompt,
+                            prompts_filename if k == 0 else f"{stem}_part{k + 1:02d}{ext}")
+            for k, chunk in enumerate(chunks)
+        ]
+        for future in chunk_futures:
+            prompts.update(future.result())
+    return prompts
+
+
 def create_fallback_prompt(slide_title: str) -> str:
     """Create a fallback prompt for a slide if AI generation fails
     
@@ -227,79 +436,168 @@ def create_fallback_prompt(slide_title: str) -> str:
            f"Focus on {config['focus']} with {config['color_scheme']}.")
 
 
-def generate_all_image_prompts(outline_data: dict, max_slides: int = 0) -> Dict[str, str]:
+def generate_all_image_prompts(outline_data: dict, max_slides: int = 0,
+                               prompts_filename: str = "06_Enhanced_Prompts.txt") -> Dict[str, str]:
     """Generate image prompts for all slides in the presentation in a single batch
     
     Args:
         outline_data: The parsed outline data structure
         max_slides: Maximum number of slides to generate prompts for (0 = no limit)
+        prompts_filename: File the raw LLM response is saved to
         
     Returns:
         Dictionary of slide titles to enhanced prompts
     """
-    global prompt_cache
-    
     print("\nPreparing slide content for batch prompt generation...")
     slides_info = extract_slide_info(outline_data, max_slides)
-    print(f"Found {len(slides_info)} slides for prompt generation")
-    print("****************************************************")
-    # Build system prompt for AI model
-    system_prompt = f"""
-You are an expert AI image prompt engineer for presentations.
+    return generate_image_prompts_for_slides_info(slides_info, prompts_filename)
 
-I will provide you with a list of slide titles and content.
-For EACH slide, create an AI image generation concise prompt that would produce a visually appealing 
-image representing that slide's idea or concept.
 
-The image prompts should:
-- Be visually appealing and suitable for a {config['prompt_style']}
-- NOT generate any text
-- Focus on {config['focus']}
-- Use {config['color_scheme']}
+def generate_all_image_prompts_from_slides(slides_data: List[dict], max_slides: int = 0,
+                                           prompts_filename: str = "06_Enhanced_Prompts.txt") -> Dict[str, str]:
+    """Generate image prompts for prepared slide data in a single batch
+    
+    Args:
+        slides_data: List of slide dictionaries with title and content (a list of bullets or a string)
+        max_slides: Maximum number of slides to generate prompts for (0 = no limit)
+        prompts_filename: File the raw LLM response is saved to
+        
+    Returns:
+        Dictionary of slide titles to enhanced prompts
+    """
+    if max_slides > 0:
+        slides_data = slides_data[:max_slides]
+    slides_info = [
+        {"title": slide["title"],
+         "content": "\n".join(slide["content"]) if isinstance(slide["content"], list) else str(slide["content"])}
+        for slide in slides_data
+    ]
+    return generate_image_prompts_for_slides_info(slides_info, prompts_filename)
 
-Provide your response as a JSON object with the following structure:
-{{"slide_title": "prompt"}}
 
-Only include the JSON response with no additional explanations or text.
-"""
+def generate_image_prompts_for_slides_info(slides_info: List[dict],
+                                           prompts_filename: str = "06_Enhanced_Prompts.txt") -> Dict[str, str]:
+    """Generate image prompts for a list of slide titles and contents with the LLM
     
-    # Build the user prompt with all slides
-    slides_json = json.dumps(slides_info, indent=2)
-    user_prompt = f"Generate unique image prompts for each of these presentation slides:\n{slides_json}"
+    Uncached slides are sent in concurrent chunks of PROMPT_CHUNK_SIZE. Slides
+    missing from a partly usable response are requested once more; only the
+    slides still without a prompt get a fallback prompt.
     
-    # Call LLM through the module
-    try:
-        print(f"Sending batch request to generate {len(slides_info)} slide prompts...")
-        enhanced_prompts_json = call_llm(user_prompt, system_prompt)
-        
-        # Save the raw enhanced prompts to a file
-        output_path = save_prompts_to_file(enhanced_prompts_json)
-        print(f"Enhanced prompts saved to: {output_path}")
+    Args:
+        slides_info: List of dictionaries with slide title and content string
+        prompts_filename: File the raw LLM response is saved to
         
-        # Parse the JSON response
-        try:
-            # Clean and parse JSON
-            cleaned_json = clean_json_response(enhanced_prompts_json)
-            prompt_cache = json.loads(cleaned_json)
-            print(f"Successfully received {len(prompt_cache)} enhanced prompts")
-            
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON response: {str(e)}")
-            # Use fallback prompts if JSON parsing fails
-            prompt_cache = {}
-            for slide_info in slides_info:
-                slide_title = slide_info["title"]
-                prompt_cache[slide_title] = create_fallback_prompt(slide_title)
-    
-    except Exception as e:
-        print(f"Error generating enhanced prompts: {str(e)}")
-        # Use fallback prompts if API call fails
-        prompt_cache = {}
-        for slide_info in slides_info:
-            slide_title = slide_info["title"]
-            prompt_cache[slide_title] = create_fallback_prompt(slide_title)
+    Returns:
+        Dictionary of slide titles to enhanced prompts for these slides (they are
+        also merged into prompt_cache)
+    """
+    # Slides with the same title and content get the same prompt, so request it once
+    unique_slides = list({(slide_info["title"], slide_info["content"]): slide_info
+                          for slide_info in slides_info}.values())
+    if len(unique_slides) < len(slides_info):
+        print(f"Skipping {len(slides_info) - len(unique_slides)} duplicate slides")
+    slides_info = unique_slides
     
-    return prompt_cache
+    print(f"Found {len(slides_info)} slides for prompt generation")
+    print("****************************************************")
+    system_prompt = IMAGE_PROMPT_SYSTEM_PROMPT
+    
+    # Reuse prompts generated on earlier runs for unchanged slides, unless caching is off
+    cached_prompts = {}
+    uncached_slides = []
+    for slide_info in slides_info:
+        if LLM_CACHE_SETTINGS is None:
+            uncached_slides.append(slide_info)
+            continue
+        try:
+            cache_path = prompt_cache_path(slide_info)
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                prompt = f.read()
+            # Touch the entry so pruning removes the least recently used first
+            os.utime(cache_path)
+            cached_prompts[slide_info["title"]] = prompt
+            prompts_by_slide_key[prompt_cache_key(slide_info["title"], slide_info["content"])] = prompt
+        except OSError:
+            uncached_slides.append(slide_info)
+    
+    if not uncached_slides:
+        print(f"All {len(slides_info)} prompts found in the prompt cache")
+        with prompt_cache_lock:
+            prompt_cache.update(cached_prompts)
+        return cached_prompts
+    if cached_prompts:
+        print(f"Found {len(cached_prompts)} prompts in the prompt cache")
+    slides_info = uncached_slides
+    
+    # The response is keyed by title, so slides that share a title but differ in
+    # content are numbered in the request ("Title (2)") to get a prompt each
+    title_counts = {}
+    request_slides = []
+    for slide_info in slides_info:
+        count = title_counts[slide_info["title"]] = title_counts.get(slide_info["title"], 0) + 1
+        request_title = slide_info["title"] if count == 1 else f"{slide_info['title']} ({count})"
+        request_slides.append({"title": request_title, "content": slide_info["content"]})
+    
+    new_prompts = request_image_prompts_in_chunks(request_slides, system_prompt, prompts_filename)
+    
+    # Ask once more for slides the response missed. A response with no usable prompts at all
+    # isn't retried - the identical request would most likely fail the same way
+    missing_slides = [request_slide for request_slide in request_slides if not new_prompts.get(request_slide["title"])]
+    if missing_slides and len(missing_slides) < len(request_slides):
+        print(f"Requesting the {len(missing_slides)} prompts missing from the response again...")
+        retry_filename = os.path.splitext(prompts_filename)[0] + "_retry.txt"
+        new_prompts.update(request_image_prompts_in_chunks(missing_slides, system_prompt, retry_filename))
+    
+    # Cache the new prompts (fallback prompts are never cached). Each file is
+    # written under a temporary name and renamed, so a crash never leaves a partial prompt
+    prompts = {}
+    try:
+        if LLM_CACHE_SETTINGS is not None:
+            os.makedirs(PROMPT_CACHE_DIR, exist_ok=True)
+        for slide_info, request_slide in zip(slides_info, request_slides):
+            prompt = new_prompts.get(request_slide["title"])
+            if isinstance(prompt, str) and prompt:
+                prompts.setdefault(slide_info["title"], prompt)
+                prompts_by_slide_key[prompt_cache_key(slide_info["title"], slide_info["content"])] = prompt
+                if LLM_CACHE_SETTINGS is None:
+                    continue
+                cache_path = prompt_cache_path(slide_info)
+                with open(cache_path + ".tmp", 'w', encoding='utf-8') as f:
+                    f.write(prompt)
+                os.replace(cache_path + ".tmp", cache_path)
+    except OSError as e:
+        print(f"Warning: could not cache enhanced prompts: {e}")
+    if LLM_CACHE_SETTINGS is not None:
+        prune_prompt_cache()
+    
+    # Use fallback prompts only for the slides that still have none
+    for slide_info in slides_info:
+        slide_title = slide_info["title"]
+        if slide_title not in prompts:
+            prompts[slide_title] = create_fallback_prompt(slide_title)
+    
+    prompts.update(cached_prompts)
+    with prompt_cache_lock:
+        prompt_cache.update(prompts)
+    return prompts
+
+
+def prune_prompt_cache() -> None:
+    """Keep the prompt cache at PROMPT_CACHE_MAX_ENTRIES by deleting the least recently used prompts"""
+    try:
+        with os.scandir(PROMPT_CACHE_DIR) as entries:
+            files = [entry for entry in entries if entry.is_file() and entry.name.endswith(".txt")]
+    except OSError:
+        return
+    if len(files) <= PROMPT_CACHE_MAX_ENTRIES:
+        return
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:len(files) - PROMPT_CACHE_MAX_ENTRIES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
 
 def get_enhanced_prompt(slide_title: str, slide_content: str = "") -> str:
     """Get an enhanced prompt for a specific slide
@@ -311,10 +609,25 @@ def get_enhanced_prompt(slide_title: str, slide_content: str = "") -> str:
     Returns:
         Enhanced image generation prompt for this slide
     """
-    # Check if we have a pre-generated prompt for this slide
-    if slide_title in prompt_cache:
+    # Prefer the prompt generated for this exact slide (title and content), in memory or on disk
+    if slide_content:
+        slide_key = prompt_cache_key(slide_title, slide_content)
+        if slide_key in prompts_by_slide_key:
+            return prompts_by_slide_key[slide_key]
+        if LLM_CACHE_SETTINGS is not None:
+            try:
+                with open(os.path.join(PROMPT_CACHE_DIR, f"{slide_key}.txt"), 'r', encoding='utf-8') as f:
+                    prompts_by_slide_key[slide_key] = f.read()
+                return prompts_by_slide_key[slide_key]
+            except OSError:
+                pass
+    
+    # Then a pre-generated prompt for a slide with this title
+    with prompt_cache_lock:
+        prompt = prompt_cache.get(slide_title)
+    if prompt:
         print(f"Using pre-generated prompt for: {slide_title}")
-        return prompt_cache[slide_title]
+        return prompt
     else:
         # Fallback to a basic prompt if no pre-generated prompt is available
         print(f"No pre-generated prompt found for: {slide_title}. Using fallback.")
@@ -331,14 +644,184 @@ def sanitize_filename(name: str, max_length: int = 30) -> str:
     Returns:
         Sanitized filename
     """
-    # Remove invalid filename characters
-    safe_name = re.sub(r'[^\w\-_.]+', '_', name)
+    # Replace invalid filename characters and truncate if needed
+    return UNSAFE_FILENAME_CHARS_RE.sub('_', name)[:max_length]
+
+
+def _image_store_path(prompt, width, height):
+    key = hashlib.sha256(f"{prompt}|{width}|{height}".encode("utf-8")).hexdigest()
+    # The size prefix lets near-duplicate lookups skip images of other sizes
+    return os.path.join(IMAGE_STORE_DIR, f"{width}x{height}_{key}.png")
+
+
+@functools.lru_cache(maxsize=1)
+def _load_prompt_embedder():
+    """Load the sentence embedding model for near-duplicate image lookups once"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(IMAGE_STORE_EMBEDDING_MODEL)
+
+
+def _embed_prompts(prompts):
+    """Embed image prompts as rows of normalized vectors"""
+    return _load_prompt_embedder().encode(list(prompts), normalize_embeddings=True).astype("float32")
+
+
+def _get_image_store_index():
+    """Return the (embeddings, stored file names) index, loading it from disk the first time"""
+    global _image_store_index
+    import numpy as np
+    
+    if _image_store_index is None:
+        _image_store_index = (np.zeros((0, 0), dtype=np.float32), [])
+        if os.path.exists(IMAGE_STORE_INDEX_FILE):
+            try:
+                with np.load(IMAGE_STORE_INDEX_FILE) as data:
+                    _image_store_index = (data["embeddings"], data["names"].tolist())
+            except Exception as e:
+                print(f"Error loading image store index: {e}")
+    return _image_store_index
+
+
+def _save_image_store_index(embeddings, names):
+    """Keep the index entries whose stored image still exists and write the index to disk"""
+    global _image_store_index
+    import numpy as np
+    
+    keep = [i for i, name in enumerate(names) if os.path.exists(os.path.join(IMAGE_STORE_DIR, name))]
+    if len(keep) < len(names):
+        embeddings = embeddings[keep]
+        names = [names[i] for i in keep]
+    _image_store_index = (embeddings, names)
+    try:
+        np.savez(IMAGE_STORE_INDEX_FILE, embeddings=embeddings, names=np.array(names))
+    except Exception as e:
+        print(f"Error saving image store index: {e}")
+
+
+def _find_similar_stored_image(prompt, width, height):
+    """Get the stored image of a near-identical prompt of the same size, or None"""
+    import numpy as np
+    
+    embeddings, names = _get_image_store_index()
+    if not names:
+        return None
+    
+    # Embeddings are normalized, so the dot product is cosine similarity
+    size = f"{width}x{height}"
+    scores = embeddings @ _embed_prompts([prompt])[0]
+    for best in np.argsort(scores)[::-1]:
+        if scores[best] < IMAGE_STORE_SIMILARITY_THRESHOLD:
+            return None
+        if names[best].startswith(size + "_"):
+            return os.path.join(IMAGE_STORE_DIR, names[best])
+    return None
+
+
+def fetch_stored_image(prompt, width, height, image_path):
+    """
+    Copy the stored image for an identical (or near-identical) prompt and size to image_path.
     
-    # Truncate if needed
-    if len(safe_name) > max_length:
-        safe_name = safe_name[:max_length]
+    Near-identical prompts are matched by sentence embeddings when
+    sentence-transformers is installed.
+    
+    Args:
+        prompt: Image generation prompt
+        width: Image width
+        height: Image height
+        image_path: Where the slide image should be written
         
-    return safe_name
+    Returns:
+        True if a stored image was copied, False if the image must be generated
+    """
+    stored_path = _image_store_path(prompt, width, height)
+    if not os.path.exists(stored_path) and SEMANTIC_IMAGE_STORE_AVAILABLE:
+        try:
+            stored_path = _find_similar_stored_image(prompt, width, height) or stored_path
+        except Exception as e:
+            print(f"Error searching the image store index: {e}")
+    try:
+        # Copy rather than hard-link, so regenerating the slide image in place
+        # can never modify the stored copy
+        shutil.copyfile(stored_path, image_path)
+        # Touch the entry so pruning removes the least recently used first
+        os.utime(stored_path)
+        return True
+    except OSError:
+        return False
+
+
+def store_images(prompts, width, height, image_paths):
+    """
+    Keep a copy of generated images under the hash of their prompt and size.
+    
+    The prompts of a batch are embedded in one call and the index is written
+    once, so call this once per batch rather than once per image.
+    
+    Args:
+        prompts: Image generation prompts
+        width: Image width
+        height: Image height
+        image_paths: Paths to the images generated for the prompts
+    """
+    stored = []
+    try:
+        os.makedirs(IMAGE_STORE_DIR, exist_ok=True)
+        for prompt, image_path in zip(prompts, image_paths):
+            if image_path and os.path.exists(image_path):
+                stored_path = _image_store_path(prompt, width, height)
+                shutil.copyfile(image_path, stored_path)
+                stored.append((prompt, stored_path))
+    except OSError as e:
+        print(f"Warning: could not store generated image: {e}")
+    
+    if not stored or not SEMANTIC_IMAGE_STORE_AVAILABLE:
+        return
+    import numpy as np
+    
+    try:
+        embeddings, names = _get_image_store_index()
+        new_names = [os.path.basename(stored_path) for _, stored_path in stored]
+        keep = [i for i, name in enumerate(names) if name not in new_names]
+        vectors = _embed_prompts([prompt for prompt, _ in stored])
+        if keep:
+            vectors = np.vstack([embeddings[keep], vectors])
+        _save_image_store_index(vectors, [names[i] for i in keep] + new_names)
+    except Exception as e:
+        print(f"Error updating the image store index: {e}")
+
+
+def store_image(prompt, width, height, image_path):
+    """
+    Keep a copy of a generated image under the hash of its prompt and size.
+    
+    Args:
+        prompt: Image generation prompt
+        width: Image width
+        height: Image height
+        image_path: Path to the generated image
+    """
+    store_images([prompt], width, height, [image_path])
+
+
+def prune_image_store():
+    """Keep the image store at IMAGE_STORE_MAX_ENTRIES by deleting the least recently used images"""
+    try:
+        with os.scandir(IMAGE_STORE_DIR) as entries:
+            files = [entry for entry in entries if entry.is_file() and entry.name.endswith(".png")]
+    except OSError:
+        return
+    if len(files) <= IMAGE_STORE_MAX_ENTRIES:
+        return
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:len(files) - IMAGE_STORE_MAX_ENTRIES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    
+    # Drop the index entries of the removed images
+    if SEMANTIC_IMAGE_STORE_AVAILABLE and os.path.exists(IMAGE_STORE_INDEX_FILE):
+        _save_image_store_index(*_get_image_store_index())
 
 
 def generate_image_for_slide(slide_title: str, slide_content: str = "") -> Optional[str]:
@@ -362,6 +845,11 @@ def generate_image_for_slide(slide_title: str, slide_content: str = "") -> Optio
     image_filename = f"slide_{safe_title}.png"
     image_path = os.path.join(config["image_dir"], image_filename)
     
+    # Reuse the stored image of an identical or near-identical prompt
+    if fetch_stored_image(prompt, IMAGE_WIDTH, IMAGE_HEIGHT, image_path):
+        print(f"Using stored image for slide: {slide_title}")
+        return image_path
+    
     # Generate the image
     print(f"Generating image for slide: {slide_title}")
     print(f"Prompt: {prompt}")
@@ -378,6 +866,7 @@ def generate_image_for_slide(slide_title: str, slide_content: str = "") -> Optio
         
         # Return the first image path if successful
         if image_files and len(image_files) > 0:
+            store_image(prompt, IMAGE_WIDTH, IMAGE_HEIGHT, image_files[0])
             return image_files[0]
         else:
             print(f"Warning: No images were generated for slide '{slide_title}'")
@@ -392,7 +881,7 @@ def generate_slide_images_parallel(slides_data, batch_size: int = 25) -> Dict[st
     
     Args:
         slides_data: List of slide dictionaries with title and content
-        batch_size: Maximum number of slides to process in each batch
+        batch_size: Maximum number of images to request from the API at once
         
     Returns:
         Dictionary mapping slide titles to image paths
@@ -404,52 +893,103 @@ def generate_slide_images_parallel(slides_data, batch_size: int = 25) -> Dict[st
     # Track image paths by title
     image_paths_by_title = {}
     
-    # Get all existing images in the output directory
+    # Get all existing images in the output directory with one listing, instead
+    # of a stat per slide
     slide_images_dir = config["image_dir"]
-    existing_files = []
+    existing_files = set()
     if os.path.exists(slide_images_dir):
-        existing_files = os.listdir(slide_images_dir)
+        existing_files = set(os.listdir(slide_images_dir))
+    
+    # Import here to avoid circular imports
+    from arunware_image_generator import generate_image, generate_images_parallel
+    
+    # Workers share stdout, so their messages are printed one at a time
+    print_lock = threading.Lock()
+    
+    def render_slide_image(j, slide, prompt, output_path):
+        """Generate one slide's image with its own API request"""
+        with print_lock:
+            print(f"Generating image {j+1}/{len(slides_data)}: {slide['title']}")
+        try:
+            image_files = generate_image(
+                prompt=prompt,
+                output_path=output_path,
+                width=IMAGE_WIDTH,
+                height=IMAGE_HEIGHT,
+                num_images=1
+            )
+            if not image_files:
+                with print_lock:
+                    print(f"Warning: Failed to generate image for slide {j+1}")
+        except Exception as e:
+            with print_lock:
+                print(f"Error generating image for slide {j+1}: {str(e)}")
     
-    # Process slides sequentially (in real implementation, this would be parallel)
+    # Reuse existing images, and collect the slides (with their prompts) that still need one.
+    # A slide identical to an earlier pending one (same title and content) gets a copy of its image
+    pending = []
+    pending_paths_by_slide = {}
+    duplicates = []
     for j, slide in enumerate(slides_data):
         # Create numeric filename for output consistency
         slide_num = j + 1  # 1-based indexing
         image_filename = f"{slide_num:02d}_slide.png"
         output_path = os.path.join(slide_images_dir, image_filename)
         
-        # Check if image already exists
-        if image_filename in existing_files and os.path.exists(output_path):
+        # Keep an existing slide image; otherwise an identical (or near-identical)
+        # prompt and size may already have an image in the store
+        if image_filename in existing_files:
             print(f"Image already exists for slide {j+1}: {output_path}")
+            image_paths_by_title[slide["title"]] = output_path
+            continue
+        prompt = get_enhanced_prompt(slide["title"], slide["content"])
+        if fetch_stored_image(prompt, IMAGE_WIDTH, IMAGE_HEIGHT, output_path):
+            print(f"Using stored image for slide {j+1}: {output_path}")
+            image_paths_by_title[slide["title"]] = output_path
         else:
-            # Generate the image for this slide
-            prompt = get_enhanced_prompt(slide["title"], slide["content"])
-            print(f"Generating image {j+1}/{len(slides_data)}: {slide['title']}")
-            
-            # In a real parallel implementation, this would be added to a task queue
-            # For now, we'll just generate sequentially
-            try:
-                # Import here to avoid circular imports
-                from arunware_image_generator import generate_image
-                
-                image_files = generate_image(
-                    prompt=prompt,
-                    output_path=output_path,
-                    width=IMAGE_WIDTH,
-                    height=IMAGE_HEIGHT,
-                    num_images=1
-                )
-                
-                if not image_files or len(image_files) == 0:
-                    print(f"Warning: Failed to generate image for slide {j+1}")
-            except Exception as e:
-                print(f"Error generating image for slide {j+1}: {str(e)}")
+            content = slide["content"]
+            slide_key = (slide["title"], "\n".join(content) if isinstance(content, list) else content)
+            if slide_key in pending_paths_by_slide:
+                duplicates.append((j, slide, output_path, pending_paths_by_slide[slide_key]))
+                continue
+            pending_paths_by_slide[slide_key] = output_path
+            pending.append((j, slide, prompt, output_path))
+    
+    # Send the prompts in batches of batch_size - one batch request instead of one
+    # request per slide. If a batch request fails, fall back to concurrent single requests
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        print(f"Generating images for slides {batch[0][0] + 1} to {batch[-1][0] + 1} in one batch")
+        try:
+            generate_images_parallel(
+                prompts_and_paths=[(prompt, output_path) for _, _, prompt, output_path in batch],
+                width=IMAGE_WIDTH,
+                height=IMAGE_HEIGHT,
+                num_images=1
+            )
+        except Exception as e:
+            print(f"Batch image request failed ({str(e)}), generating these images one by one")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                list(executor.map(lambda slide_job: render_slide_image(*slide_job), batch))
         
-        # Add to our mapping regardless of whether we just generated it or it existed
-        if os.path.exists(output_path):
+        # The images are written to the requested paths, so map them back by path
+        for j, slide, prompt, output_path in batch:
+            if os.path.exists(output_path):
+                image_paths_by_title[slide["title"]] = output_path
+            else:
+                print(f"Warning: No image file found for slide {j+1}")
+        store_images([prompt for _, _, prompt, _ in batch], IMAGE_WIDTH, IMAGE_HEIGHT,
+                     [output_path for _, _, _, output_path in batch])
+    
+    # Copy the images of duplicate slides into their own numbered slots
+    for j, slide, output_path, source_path in duplicates:
+        try:
+            shutil.copyfile(source_path, output_path)
             image_paths_by_title[slide["title"]] = output_path
-        else:
+        except OSError:
             print(f"Warning: No image file found for slide {j+1}")
     
+    prune_image_store()
     print(f"Completed image generation. Generated {len(image_paths_by_title)} images.")
     return image_paths_by_title
 
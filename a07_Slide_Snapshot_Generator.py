@@ -18,6 +18,7 @@ Usage:
 
 import os
 import textwrap
+import concurrent.futures
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
@@ -41,6 +42,9 @@ TITLE_COLOR = (0, 68, 129)  # Dark blue
 TEXT_COLOR = (50, 50, 50)  # Dark gray
 PADDING = 50  # Padding from edges
 
+# Worker processes for rendering snapshots (None = one per CPU)
+SNAPSHOT_MAX_WORKERS = None
+
 def create_slide_snapshot(title, content, ai_image_path, output_path, template_path=None):
     """
     Create a slide snapshot with title, content, and AI-generated image.
@@ -168,15 +172,17 @@ def generate_snapshots_for_presentation(slides_data, ai_image_paths, output_dir,
     Generate snapshots for all slides in a presentation.
     
     Args:
-        slides_data: List of dictionaries with slide information (title, content)
-        ai_image_paths: Dictionary mapping slide titles to AI-generated image paths
+        slides_data: List of dictionaries with slide information (title, content,
+            and optionally a unique slide_id); any other keys are ignored
+        ai_image_paths: Dictionary mapping slide ids (or titles, for slides
+            without an id) to AI-generated image paths
         output_dir: Directory where snapshot images will be saved
         template_path: Optional path to a template background image
         title_image_path: Optional path to the title slide image
         course_title: Optional title of the course for the title slide
         
     Returns:
-        Dictionary mapping slide titles to snapshot image paths
+        Dictionary mapping slide ids (or titles) to snapshot image paths
     """
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
@@ -214,43 +220,51 @@ def generate_snapshots_for_presentation(slides_data, ai_image_paths, output_dir,
         except Exception as e:
             print(f"Error creating title slide snapshot: {e}")
     
-    # Process each slide
-    for slide in slides_data:
-        title = slide["title"]
-        content = slide.get("content", [])
-        
-        # Get AI image path if available
-        ai_image_path = ai_image_paths.get(title)
-        
-        # Debug: print if we found a match in the image_paths dictionary
-        print(f"Looking for image for '{title}': {'Found' if ai_image_path else 'Not found'} in image_paths")
-        
-        # If we have a path, check if the file exists
-        if ai_image_path:
-            if os.path.exists(ai_image_path):
-                print(f"Image found at: {ai_image_path}")
-            else:
-                print(f"Warning: AI image not found for '{title}': {ai_image_path}")
-                ai_image_path = None
-        
-        # Generate safe filename from title with slide number prefix (001_, 002_, etc.)
-        slide_index = list(slides_data).index(slide) + 1  # 1-based indexing
-        safe_title = "".join(c if c.isalnum() else "_" for c in title)
-        snapshot_filename = f"{slide_index:03d}_snapshot_{safe_title}.png"
-        snapshot_path = os.path.join(output_dir, snapshot_filename)
-        
-        # Create snapshot
-        result_path = create_slide_snapshot(
-            title, 
-            content, 
-            ai_image_path, 
-            snapshot_path, 
-            template_path
-        )
+    # Slides render independently and the drawing is CPU-bound, so render
+    # them in worker processes and collect the results in slide order
+    with concurrent.futures.ProcessPoolExecutor(max_workers=SNAPSHOT_MAX_WORKERS) as executor:
+        snapshot_futures = []
+        for slide_index, slide in enumerate(slides_data, start=1):  # 1-based indexing
+            title = slide["title"]
+            content = slide.get("content", [])
+            # Titles can repeat across topics, so prefer the slide's unique id
+            slide_key = slide.get("slide_id", title)
+            
+            # Get AI image path if available
+            ai_image_path = ai_image_paths.get(slide_key)
+            
+            # Debug: print if we found a match in the image_paths dictionary
+            print(f"Looking for image for '{title}': {'Found' if ai_image_path else 'Not found'} in image_paths")
+            
+            # If we have a path, check if the file exists
+            if ai_image_path:
+                if os.path.exists(ai_image_path):
+                    print(f"Image found at: {ai_image_path}")
+                else:
+                    print(f"Warning: AI image not found for '{title}': {ai_image_path}")
+                    ai_image_path = None
+            
+            # Generate safe filename from title with slide number prefix (001_, 002_, etc.)
+            safe_title = "".join(c if c.isalnum() else "_" for c in title)
+            snapshot_filename = f"{slide_index:03d}_snapshot_{safe_title}.png"
+            snapshot_path = os.path.join(output_dir, snapshot_filename)
+            
+            # Create snapshot
+            future = executor.submit(
+                create_slide_snapshot,
+                title, 
+                content, 
+                ai_image_path, 
+                snapshot_path, 
+                template_path
+            )
+            snapshot_futures.append((slide_key, title, future))
         
-        if result_path:
-            snapshot_paths[title] = result_path
-            print(f"Created snapshot for '{title}'")
+        for slide_key, title, future in snapshot_futures:
+            result_path = future.result()
+            if result_path:
+                snapshot_paths[slide_key] = result_path
+                print(f"Created snapshot for '{title}'")
     
     return snapshot_paths
 
@@ -146,15 +146,18 @@ def extract_slides_as_images(pptx_file, output_dir):
         # Find all snapshot images in the directory
         print(f"Looking for slide snapshots in {output_dir}...")
         
+        # List the image files once - scandir entries carry their file type, so no extra stat per file
+        with os.scandir(output_dir) as entries:
+            all_image_files = [entry.name for entry in entries
+                               if entry.name.endswith((".png", ".jpg")) and entry.is_file()]
+        
         # Get all snapshot image files - look for both numbered (001_snapshot_) and old format (snapshot_) files
-        snapshot_files = [f for f in os.listdir(output_dir) 
-                        if (re.search(r'^\d+_snapshot_', f) or f.startswith("snapshot_")) 
-                        and (f.endswith(".png") or f.endswith(".jpg"))]
+        snapshot_files = [f for f in all_image_files
+                        if re.search(r'^\d+_snapshot_', f) or f.startswith("snapshot_")]
         
         if not snapshot_files:
             print(f"Warning: No slide snapshot images found in {output_dir}")
             # Check if there are any PNG files at all
-            all_image_files = [f for f in os.listdir(output_dir) if f.endswith(".png") or f.endswith(".jpg")]
             if all_image_files:
                 print(f"Found {len(all_image_files)} non-snapshot image files. Will use those instead.")
                 snapshot_files = all_image_files